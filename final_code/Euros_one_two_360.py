@@ -1,19 +1,24 @@
-import pandas as pd
 import json
-from one_two.functions import get_pass_data, get_one_twos, get_player_one_twos, plot_match_one_twos
+import os
+from one_two.functions import iter_one_twos, get_player_one_twos, plot_match_one_twos, collect_one_twos, \
+    attach_freeze_frames, PASS_COLUMNS
+from one_two.cache import PassCache
+from one_two import profiling
 
 
-def main(input_file):
+def main(input_file, input_dir="inputs", plot_dir="slide_plots"):
     """
     main function for generating all one-two passes for specified team for a specified tournament
     also then filters by players listed in input file
     and then plots the successful one-two with 360 information to show positions of other players
     TODO - change hard-coded Beth Mead plots to plot any successful one-two (i.e. one that results in an assist)
     :param input_file: json, dictionary of inputs
+    :param input_dir: str, folder holding the input file
+    :param plot_dir: str, folder to save the plot to
     :return: None
     """
     # read in inputs
-    with open(f"inputs/{input_file}.json", "r") as f:
+    with open(os.path.join(input_dir, f"{input_file}.json"), "r") as f:
         inputs = json.load(f)
     comp = inputs["competition_name"]
     comp_id = inputs["competition_id"]
@@ -21,28 +26,39 @@ def main(input_file):
     path = inputs["path_to_360"]
     team = inputs["team"]
     players = inputs["players"]
+    cache = PassCache(inputs["cache_dir"]) if "cache_dir" in inputs else None
+    open_data_path = inputs["path_to_open_data"] if inputs.get("data_source") == "local" else None
+    # opt-in timings of each stage (see one_two.profiling)
+    if "profile" in inputs:
+        profiling.start(**inputs["profile"])
+    try:
+        # get one-twos for England for whole tournament, one match at a time (only the columns detection needs) ...
+        # ... and pick out the one-twos of the specified players as we go
+        player_matches = {player: [] for player in players}
+        for match, one_twos in iter_one_twos(competition_ID=comp_id, season_ID=season_id, team=team, data_path=path,
+                                             cache=cache, columns=PASS_COLUMNS, open_data_path=open_data_path):
+            for player in players:
+                player_matches[player].append((match, get_player_one_twos(player=player, data=one_twos)))
+        if cache is not None:
+            cache.report()
 
-    # get all passes for England for whole tournament
-    pass_data = get_pass_data(competition_ID=comp_id, season_ID=season_id, team=team, data_path=path)
+        # get one-twos for specified players for all matches
+        player_data = {}
+        for player in players:
+            player_data[player] = collect_one_twos(player_matches[player])
 
-    # then get one_twos
-    one_twos_eng_dict = {}
-    for match in pass_data.keys():
-        one_twos_eng_dict[match] = get_one_twos(match=pass_data[match])
+        # get key beth mead one-two
+        BM_data = player_data["Bethany Mead"]
+        BM_assist = BM_data.iloc[2:4, :]
 
-    # get one-twos for specified players for all matches
-    player_data = {}
-    for player in players:
-        player_data[player] = pd.DataFrame([])
-        for key in one_twos_eng_dict.keys():
-            player_temp = get_player_one_twos(player=player, data=one_twos_eng_dict[key])
-            player_data[player] = pd.concat([player_data[player], player_temp])
+        # 360 freeze frame of the closing pass, looked up just for the one-two being plotted
+        BM_assist = attach_freeze_frames(BM_assist, data_path=path, open_data_path=open_data_path, cache=cache,
+                                         competition_ID=comp_id, season_ID=season_id)
 
-    # get key beth mead one-two
-    BM_data = player_data["Bethany Mead"]
-    BM_assist = BM_data.iloc[2:4, :]
-
-    plot_match_one_twos(data=BM_assist, save=True, grid=False)
+        plot_match_one_twos(data=BM_assist, save=True, grid=False, plot_dir=plot_dir)
+    finally:
+        # print the stage summary and write the trace (if profiling) - even if something above failed
+        profiling.stop()
 
 
 if __name__ == '__main__':
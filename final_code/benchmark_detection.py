@@ -0,0 +1,68 @@
+# compare the vectorised one-two detection against the original loop over a full season (and time the by possession
+# search) - tests/test_detection.py checks them against each other offline
+from one_two.functions import iter_match_passes, get_one_twos
+from one_two.cache import PassCache
+import argparse
+import json
+import time
+
+
+def main(input_file):
+    """
+    load every match of the season in the input file, run both one-two detection methods on each match,
+    check they find exactly the same one-twos and print how long each took - plus the vectorised search within each
+    possession, which finds a subset of them
+    :param input_file: json, dictionary of inputs
+    :return: None
+    """
+    # read in inputs
+    with open(f"inputs/{input_file}.json", "r") as f:
+        inputs = json.load(f)
+    comp_id = inputs["competition_id"]
+    season_id = inputs["season_id"]
+    s_thresh = inputs["threshold_seconds"]
+    p_thresh = inputs["threshold_progression"]
+    c_thresh = inputs["threshold_carry"]
+
+    cache = PassCache(inputs["cache_dir"]) if "cache_dir" in inputs else None
+    open_data_path = inputs["path_to_open_data"] if inputs.get("data_source") == "local" else None
+
+    timings = {"loop": 0.0, "vectorised": 0.0}
+    possession_seconds = 0.0
+    n_matches = 0
+    n_one_twos = 0
+    n_possession = 0
+    for key, passes_df in iter_match_passes(comp_id, season_id, None, "", all_teams=True, cache=cache,
+                                            open_data_path=open_data_path):
+        # only detection is timed, not loading
+        results = {}
+        for method in timings.keys():
+            start = time.perf_counter()
+            results[method] = get_one_twos(passes_df.copy(), sec_threshold=s_thresh,
+                                           prog_threshold=p_thresh, carry_threshold=c_thresh, method=method)
+            timings[method] += time.perf_counter() - start
+
+        # both methods should pick out the same passes in the same order
+        if not results["loop"].equals(results["vectorised"]):
+            raise AssertionError(f"one-two detection methods disagree for match {key}")
+        n_matches += 1
+        n_one_twos += len(results["vectorised"])//2
+
+        start = time.perf_counter()
+        n_possession += len(get_one_twos(passes_df.copy(), sec_threshold=s_thresh, prog_threshold=p_thresh,
+                                         carry_threshold=c_thresh, by_possession=True))//2
+        possession_seconds += time.perf_counter() - start
+
+    print(f"{n_matches} matches, {n_one_twos} one-twos (identical for both methods)")
+    for method, seconds in timings.items():
+        print(f"{method}: {seconds:.2f}s")
+    print(f"speed up: {timings['loop']/max(timings['vectorised'], 1e-9):.0f}x")
+    print(f"by possession: {possession_seconds:.2f}s, {n_possession} one-twos")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="compare the one-two detection methods")
+    parser.add_argument("input_file", nargs="?", default="input_v1", help="input file of the season to benchmark")
+    args = parser.parse_args()
+
+    main(input_file=args.input_file)
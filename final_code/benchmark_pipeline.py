@@ -0,0 +1,157 @@
+# time the one-two pipeline stage by stage on synthetic or recorded matches - runs offline
+from one_two.functions import iter_match_passes, get_one_twos, collect_one_twos, get_player_one_twos, \
+    build_player_index, get_player_counts, get_team_info
+from one_two.cache import encode_passes, decode_passes
+from one_two.pairs import OneTwoPairs
+from one_two.synthetic import synthetic_season
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+import pandas as pd
+
+# number of synthetic matches for each scale (a season of 12 teams playing each other twice is 132 matches)
+SCALES = {"match": 1, "season": 132, "seasons": 396}
+
+
+def main(scale="season", fixture_dir=None, output=None, baseline=None, repeat=3):
+    """
+    run every stage of the pipeline on the same matches and print wall time, peak memory and rows/sec for each
+    :param scale: str, size of the synthetic data (see SCALES) - ignored if fixture_dir is given
+    :param fixture_dir: str, optional folder of matches saved with record_fixtures to use instead of synthetic data
+    :param output: str, optional path to write the results to as json (to compare later runs against)
+    :param baseline: str, optional path to the json results of an earlier run - the change in time is printed
+    :param repeat: int, each stage is timed this many times and the fastest kept
+    :return: dataframe, one row per stage
+    """
+    if fixture_dir is not None:
+        all_passes = load_fixtures(fixture_dir)
+    else:
+        all_passes = synthetic_season(n_matches=SCALES[scale])
+    n_passes = sum(len(passes_df) for passes_df in all_passes.values())
+    print(f"{len(all_passes)} matches, {n_passes} passes")
+
+    # run each stage once up front so the later stages have their inputs
+    results = []
+    detect = lambda: {match_id: get_one_twos(passes_df.copy()) for match_id, passes_df in all_passes.items()}
+    results.append(measure("get_one_twos", detect, n_passes, repeat))
+    one_twos = detect()
+
+    collect = lambda: collect_one_twos(one_twos)
+    results.append(measure("collect_one_twos", collect, sum(len(df) for df in one_twos.values()), repeat))
+    one_two_agg = collect()
+
+    players = pd.unique(one_two_agg["player"])
+    results.append(measure("get_player_one_twos", lambda: [get_player_one_twos(player, one_two_agg)
+                                                           for player in players], len(one_two_agg), repeat))
+    index = build_player_index(one_two_agg)
+    results.append(measure("get_player_one_twos (index)", lambda: [get_player_one_twos(player, one_two_agg, index)
+                                                                   for player in players], len(one_two_agg), repeat))
+    results.append(measure("build_player_index", lambda: build_player_index(one_two_agg), len(one_two_agg), repeat))
+    results.append(measure("OneTwoPairs.from_one_twos", lambda: OneTwoPairs.from_one_twos(one_two_agg),
+                           len(one_two_agg), repeat))
+    results.append(measure("get_player_counts", lambda: get_player_counts(one_two_agg), len(one_two_agg), repeat))
+
+    counts = get_player_counts(one_two_agg).drop(columns=["team"])
+    results.append(measure("get_team_info", lambda: get_team_info(counts.copy(), one_two_agg), len(one_two_agg),
+                           repeat))
+
+    results = pd.DataFrame(results)
+    pd.set_option("display.width", 120)
+    print(results.to_string(index=False))
+
+    if baseline is not None:
+        with open(baseline, "r") as f:
+            before = pd.DataFrame(json.load(f)).set_index("stage")["seconds"]
+        change = results.set_index("stage")["seconds"]/before
+        print("\ntime relative to baseline (below 1 is faster):")
+        print(change.dropna().round(2).to_string())
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(results.to_dict("records"), f, indent=2)
+
+    return results
+
+
+def measure(stage, func, n_rows, repeat=3):
+    """
+    time a stage (fastest of repeat runs) and find its peak memory (on a separate run, as tracemalloc slows things down)
+    :param stage: str, name of the stage
+    :param func: function, runs the stage with no arguments
+    :param n_rows: int, number of rows the stage works through (for rows/sec)
+    :param repeat: int, number of timed runs
+    :return: dict, stage, rows, seconds, rows_per_sec, peak_mb
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"stage": stage, "rows": n_rows, "seconds": round(seconds, 4), "rows_per_sec": round(n_rows/max(seconds, 1e-9)),
+            "peak_mb": round(peak/1e6, 1)}
+
+
+def record_fixtures(input_file, fixture_dir, n_matches=3):
+    """
+    save the first few matches of the season in an input file (e.g. inputs/input_v1.json) so the benchmarks can run
+    on real data without a connection
+    :param input_file: str, name of the input file
+    :param fixture_dir: str, folder to save the matches to
+    :param n_matches: int, number of matches to save
+    :return: None
+    """
+    with open(f"inputs/{input_file}.json", "r") as f:
+        inputs = json.load(f)
+    open_data_path = inputs["path_to_open_data"] if inputs.get("data_source") == "local" else None
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    matches = iter_match_passes(inputs["competition_id"], inputs["season_id"], None, "", all_teams=True,
+                                open_data_path=open_data_path)
+    for _, (match_id, passes_df) in zip(range(n_matches), matches):
+        flat_df, freeze_frames = encode_passes(passes_df)
+        flat_df.to_parquet(os.path.join(fixture_dir, f"{match_id}.parquet"))
+        if freeze_frames is not None:
+            freeze_frames.to_parquet(os.path.join(fixture_dir, f"{match_id}_360.parquet"))
+
+
+def load_fixtures(fixture_dir):
+    """
+    :param fixture_dir: str, folder of matches saved with record_fixtures
+    :return: dict, {match_id: passes dataframe} as from get_pass_data
+    """
+    all_passes = {}
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.parquet"))):
+        match_id = os.path.basename(path)[:-len(".parquet")]
+        if match_id.endswith("_360"):
+            continue
+        ff_path = os.path.join(fixture_dir, f"{match_id}_360.parquet")
+        freeze_frames = pd.read_parquet(ff_path) if os.path.exists(ff_path) else None
+        all_passes[match_id] = decode_passes(pd.read_parquet(path), freeze_frames)
+
+    return all_passes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="benchmark the one-two pipeline")
+    parser.add_argument("--scale", choices=list(SCALES), default="season")
+    parser.add_argument("--fixtures", help="folder of recorded matches to use instead of synthetic data")
+    parser.add_argument("--record", help="input file to record fixtures from (saved to --fixtures)")
+    parser.add_argument("--output", help="write the results to this json file")
+    parser.add_argument("--baseline", help="json results of an earlier run to compare against")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.record is not None:
+        record_fixtures(args.record, args.fixtures or "benchmarks/fixtures")
+    else:
+        main(scale=args.scale, fixture_dir=args.fixtures, output=args.output, baseline=args.baseline,
+             repeat=args.repeat)
@@ -0,0 +1,57 @@
+# add the seasons of some input files to the one-two warehouse - each season is loaded once, however many input files
+# use it, and seasons already in the warehouse are skipped unless --refresh is given
+from one_two.warehouse import OneTwoWarehouse, MAX_SECONDS
+from one_two.cache import PassCache
+from run_batch import find_inputs, read_job, data_key
+import argparse
+
+
+def main(patterns, warehouse_dir="warehouse", input_dir="inputs", cache_dir=None, max_seconds=MAX_SECONDS,
+         refresh=False):
+    """
+    :param patterns: list, input files - paths, globs (e.g. "old stuff/inputs/*.json") or names of files in input_dir
+    :param warehouse_dir: str, folder of the warehouse
+    :param input_dir: str, folder to look for input files given by name
+    :param cache_dir: str, optional pass cache (otherwise each season uses the cache_dir of its first input file, if
+    it has one)
+    :param max_seconds: float, widest time threshold stored (only used when the warehouse is new)
+    :param refresh: bool, if True load seasons again even if they are already in the warehouse
+    :return: OneTwoWarehouse
+    """
+    warehouse = OneTwoWarehouse(warehouse_dir, max_seconds=max_seconds)
+    stored = set()
+    if not refresh and warehouse.exists():
+        stored = set(warehouse.seasons()[["competition_id", "season_id"]].itertuples(index=False, name=None))
+
+    # the warehouse holds each season once, whichever input file (and data source) it comes from first
+    seasons = {}
+    for path in find_inputs(patterns, input_dir):
+        inputs = read_job(path)["inputs"]
+        comp_id, season_id, open_data_path = data_key(inputs)
+        seasons.setdefault((comp_id, season_id), (open_data_path, inputs))
+
+    for (comp_id, season_id), (open_data_path, inputs) in seasons.items():
+        if (comp_id, season_id) in stored:
+            print(f"competition {comp_id} season {season_id}: already in the warehouse")
+            continue
+        season_cache_dir = cache_dir or inputs.get("cache_dir")
+        cache = PassCache(season_cache_dir) if season_cache_dir is not None else None
+        n_candidates = warehouse.add_season(comp_id, season_id, "", cache=cache, open_data_path=open_data_path)
+        print(f"competition {comp_id} season {season_id}: {n_candidates} candidate one-twos")
+
+    print(warehouse.seasons().to_string(index=False))
+    return warehouse
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="add seasons to the one-two warehouse")
+    parser.add_argument("inputs", nargs="+", help="input files - paths, globs or names of files in --input-dir")
+    parser.add_argument("--warehouse", default="warehouse", help="folder of the warehouse")
+    parser.add_argument("--input-dir", default="inputs")
+    parser.add_argument("--cache-dir", help="pass cache to load the seasons through")
+    parser.add_argument("--max-seconds", type=float, default=MAX_SECONDS, help="widest time threshold stored")
+    parser.add_argument("--refresh", action="store_true", help="load seasons already in the warehouse again")
+    args = parser.parse_args()
+
+    main(args.inputs, warehouse_dir=args.warehouse, input_dir=args.input_dir, cache_dir=args.cache_dir,
+         max_seconds=args.max_seconds, refresh=args.refresh)
@@ -1,63 +1,129 @@
 # generate all plots for presentation
-from one_two.functions import get_player_one_twos, plot_one_two_heatmaps, get_season_one_twos, get_player_counts, \
-    total_one_two_stack, key_pass_relplot
+from one_two.functions import plot_one_two_heatmaps, get_season_one_twos, get_player_counts, total_one_two_stack, \
+    key_pass_relplot, render_plots, PASS_COLUMNS
+from one_two.cache import PassCache
+from one_two.pairs import OneTwoPairs
+from one_two.incremental import update_season_one_twos
+from one_two import profiling
 import json
+import os
 
-# TODO save data generated here so I can rerun plots without re-generating data
-# TODO once ^ is done then add a "if data exists" statement - if exists, load it, if not, generate it
 
-def main(input_file):
+def main(input_file, input_dir="inputs", plot_dir="slide_plots", show=True):
     """
     main function for generating plots of interest - get all one-twos for competition + season
     then find which players are most involved and do a bar plot for that
     then assess the one-two value and plot by open/close/value - labelling specified players
     and for each player specified, show their open/close heatmap
     :param input_file: json, dictionary of inputs
+    :param input_dir: str, folder holding the input file
+    :param plot_dir: str, folder to save the plots to
+    :param show: bool, if False only save the plots (headless - the player heatmaps are then drawn on
+    "render_workers" processes)
     :return: None
     """
     # read in inputs
-    with open(f"inputs/{input_file}.json", "r") as f:
+    with open(os.path.join(input_dir, f"{input_file}.json"), "r") as f:
         inputs = json.load(f)
-    comp = inputs["competition_name"]
     comp_id = inputs["competition_id"]
     season_id = inputs["season_id"]
-    players = inputs["players"]
-    n = inputs["n"]
     s_thresh = inputs["threshold_seconds"]
     p_thresh = inputs["threshold_progression"]
     c_thresh = inputs["threshold_carry"]
+    # pair passes within a possession only, rather than anywhere in the time window
+    by_possession = inputs.get("by_possession", False)
 
-    # get data here
-    one_two_agg = get_season_one_twos(comp=comp_id, season=season_id, path="", s=s_thresh, p=p_thresh, c=c_thresh)
-    one_two_player_counts = get_player_counts(one_two_agg)
+    # pass data is cached on disk so re-running the plots doesn't re-download the season
+    cache = PassCache(inputs["cache_dir"]) if "cache_dir" in inputs else None
+    # "local" reads a clone of the open-data repository instead of going through statsbombpy
+    open_data_path = inputs["path_to_open_data"] if inputs.get("data_source") == "local" else None
+    # opt-in timings of each stage, e.g. "profile": {"trace_path": "traces/plots.csv", "cprofile_dir": "traces"}
+    if "profile" in inputs:
+        profiling.start(**inputs["profile"])
+    try:
+        # get data here
+        if "store_dir" in inputs:
+            # only matches that are new or updated since the last run are processed
+            one_two_agg, one_two_player_counts, updated = update_season_one_twos(
+                comp=comp_id, season=season_id, path="", s=s_thresh, p=p_thresh, c=c_thresh,
+                store_dir=inputs["store_dir"], cache=cache, columns=PASS_COLUMNS, open_data_path=open_data_path,
+                by_possession=by_possession)
+            print(f"{len(updated)} new or updated matches")
+        else:
+            one_two_agg = get_season_one_twos(comp=comp_id, season=season_id, path="", s=s_thresh, p=p_thresh,
+                                              c=c_thresh, cache=cache, workers=inputs.get("workers", 1),
+                                              columns=PASS_COLUMNS, open_data_path=open_data_path,
+                                              by_possession=by_possession)
+            one_two_player_counts = None
+        if cache is not None:
+            cache.report()
+
+        # keep one compact row per one-two rather than the full event rows
+        one_two_pairs = OneTwoPairs.from_one_twos(one_two_agg)
+        del one_two_agg
+        if len(one_two_pairs) == 0:
+            print(f"no one-twos found for competition {comp_id} season {season_id}")
+            return
+        if one_two_player_counts is None:
+            one_two_player_counts = get_player_counts(one_two_pairs)
+
+        # print percentage of open and closed for BM and FK (for slides):
+        BM_opened = 100*(one_two_player_counts[one_two_player_counts["player"]=="Bethany Mead"]["open_count"].iloc[0]/\
+                    one_two_player_counts[one_two_player_counts["player"]=="Bethany Mead"]["total_count"].iloc[0])
+        print(f"percentage of one-twos involving Beth Mead that Mead opens: {BM_opened}")
+        FK_opened = 100*(one_two_player_counts[one_two_player_counts["player"] == "Francesca Kirby"]["open_count"].iloc[0]/\
+                    one_two_player_counts[one_two_player_counts["player"] == "Francesca Kirby"]["total_count"].iloc[0])
+        print(f"percentage of one-twos involving Fran Kirby that Kirby opens: {FK_opened}")
+
+        # print key pass percentage for BM and FK (for slides):
+        BM_pc = one_two_player_counts[one_two_player_counts["player"]=="Bethany Mead"]["key_pc"].iloc[0]
+        FK_pc = one_two_player_counts[one_two_player_counts["player"]=="Francesca Kirby"]["key_pc"].iloc[0]
+        print(f"percentage of one-twos involving Mead that are key passes: {BM_pc}")
+        print(f"percentage of one-twos involving Kirby that are key passes: {FK_pc}")
+
+        make_plots(inputs, one_two_pairs, one_two_player_counts, plot_dir, show=show,
+                   workers=inputs.get("render_workers", 1))
+    finally:
+        # print the stage summary and write the trace (if profiling) - even if something above failed
+        profiling.stop()
 
-    # then do the plots in order
-    # 1. stacked bar plot
-    total_one_two_stack(one_twos=one_two_player_counts, n=n)
 
-    # print percentage of open and closed for BM and FK (for slides):
-    BM_opened = 100*(one_two_player_counts[one_two_player_counts["player"]=="Bethany Mead"]["open_count"].iloc[0]/\
-                one_two_player_counts[one_two_player_counts["player"]=="Bethany Mead"]["total_count"].iloc[0])
-    print(f"percentage of one-twos involving Beth Mead that Mead opens: {BM_opened}")
-    FK_opened = 100*(one_two_player_counts[one_two_player_counts["player"] == "Francesca Kirby"]["open_count"].iloc[0] / \
-                one_two_player_counts[one_two_player_counts["player"] == "Francesca Kirby"]["total_count"].iloc[0])
-    print(f"percentage of one-twos involving Fran Kirby that Kirby opens: {FK_opened}")
+def make_plots(inputs, one_two_pairs, one_two_player_counts, plot_dir="slide_plots", show=True, workers=1):
+    """
+    the plots for one input file, from one-twos that have already been found
+    :param inputs: dict, the input file (competition_name, season_id, players, n and optionally heatmap_method -
+    "kde" or the much faster binned "hist")
+    :param one_two_pairs: OneTwoPairs, one-twos for the season
+    :param one_two_player_counts: dataframe, player counts (as from get_player_counts)
+    :param plot_dir: str, folder to save the plots to
+    :param show: bool, if False only save the plots
+    :param workers: int, number of processes drawing the player heatmaps when not showing them
+    :return: None
+    """
+    comp = inputs["competition_name"]
+    season_id = inputs["season_id"]
+    players = inputs["players"]
+    n = inputs["n"]
 
-    # print key pass percentage for BM and FK (for slides):
-    BM_pc = one_two_player_counts[one_two_player_counts["player"]=="Bethany Mead"]["key_pc"].iloc[0]
-    FK_pc = one_two_player_counts[one_two_player_counts["player"]=="Francesca Kirby"]["key_pc"].iloc[0]
-    print(f"percentage of one-twos involving Mead that are key passes: {BM_pc}")
-    print(f"percentage of one-twos involving Kirby that are key passes: {FK_pc}")
+    # then do the plots in order
+    # 1. stacked bar plot
+    total_one_two_stack(one_twos=one_two_player_counts, n=n, plot_dir=plot_dir, show=show)
 
     # 2. relplot
-    key_pass_relplot(one_twos=one_two_player_counts, n=n, name_labels=players)
+    key_pass_relplot(one_twos=one_two_player_counts, n=n, name_labels=players, plot_dir=plot_dir, show=show)
 
     # 3. heatmap plot
     # do heatmap for each player
-    player_data = {}
-    for player in players:
-        player_data[player] = get_player_one_twos(player, one_two_agg)
-        plot_one_two_heatmaps(data=player_data[player], competition=comp, season=season_id, team=player, combined=False)
+    heatmaps = [(plot_one_two_heatmaps, {"data": one_two_pairs.for_player(player), "competition": comp,
+                                         "season": season_id, "team": player, "combined": False, "plot_dir": plot_dir,
+                                         "method": inputs.get("heatmap_method", "kde")})
+                for player in players]
+    if show:
+        for plot, kwargs in heatmaps:
+            plot(**kwargs)
+    else:
+        # headless - draw them in parallel
+        render_plots(heatmaps, workers=workers)
 
 
 if __name__ == '__main__':
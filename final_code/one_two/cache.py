@@ -0,0 +1,278 @@
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+# bump this whenever the layout of the cached frames changes - old entries are then ignored (see clear_stale)
+SCHEMA_VERSION = 1
+
+# StatsBomb list columns holding coordinates, and how many axes each has
+COORDINATE_COLUMNS = {"location": 2, "pass_end_location": 2, "carry_end_location": 2, "shot_end_location": 3,
+                      "goalkeeper_end_location": 2}
+AXES = ["x", "y", "z"]
+
+# 360 column of lists of dicts that goes in the freeze frame side table instead
+FREEZE_FRAME_COLUMN = "freeze_frame"
+
+# column used to keep the row labels of the original frame
+INDEX_COLUMN = "frame_index"
+
+
+
+class PassCache:
+    """
+    on-disk Parquet cache of the completed passes of each match, keyed by competition, season and match id
+    coordinate lists are stored as one float column per axis and 360 freeze frames in a side table
+    (one row per player in the frame) - both are rebuilt into the usual StatsBomb columns on load
+    each match's outcome events (shots and turnovers, see outcomes.outcome_events) are kept in another side table
+    """
+
+    def __init__(self, cache_dir, schema_version=SCHEMA_VERSION, matches_max_age=None):
+        """
+        :param cache_dir: str, root folder of the cache
+        :param schema_version: int, version of the cached layout - entries from other versions are never read
+        :param matches_max_age: float, optional seconds a cached match list is used for before it is fetched again -
+        for seasons still being played (by default it is kept until invalidated, so a warm re-run never goes to the
+        network)
+        """
+        self.cache_dir = cache_dir
+        self.schema_version = schema_version
+        self.matches_max_age = matches_max_age
+        self.hits = 0
+        self.misses = 0
+
+    def _season_dir(self, competition_ID, season_ID):
+        return os.path.join(self.cache_dir, f"v{self.schema_version}", str(competition_ID), str(season_ID))
+
+    def _path(self, competition_ID, season_ID, name):
+        return os.path.join(self._season_dir(competition_ID, season_ID), f"{name}.parquet")
+
+    def get_matches(self, competition_ID, season_ID):
+        """
+        :return: dataframe, cached match list for the season, or None if it isn't cached (or is older than
+        matches_max_age)
+        """
+        path = self._path(competition_ID, season_ID, "matches")
+        if not os.path.exists(path) or (self.matches_max_age is not None and
+                                        time.time() - os.path.getmtime(path) > self.matches_max_age):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return pd.read_parquet(path)
+
+    def put_matches(self, competition_ID, season_ID, matches_df):
+        """
+        save the match list for the season - cached passes of matches StatsBomb has updated since the last list was
+        saved (or that have gone from it) are dropped, so they are loaded again
+        """
+        path = self._path(competition_ID, season_ID, "matches")
+        if os.path.exists(path):
+            before = pd.read_parquet(path)
+            current = {match_id: match_version(match) for match_id, match in zip(matches_df["match_id"],
+                                                                              matches_df.to_dict("records"))}
+            for match_id, match in zip(before["match_id"], before.to_dict("records")):
+                if current.get(match_id) != match_version(match):
+                    self.invalidate(competition_ID, season_ID, match_id)
+
+        os.makedirs(self._season_dir(competition_ID, season_ID), exist_ok=True)
+        matches_df.to_parquet(path)
+
+    def get_passes(self, competition_ID, season_ID, match_id):
+        """
+        :return: dataframe, cached passes for the match, or None if they aren't cached
+        """
+        path = self._path(competition_ID, season_ID, match_id)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        passes_df = pd.read_parquet(path)
+        ff_path = self._path(competition_ID, season_ID, f"{match_id}_360")
+        freeze_frames = pd.read_parquet(ff_path) if os.path.exists(ff_path) else None
+
+        return decode_passes(passes_df, freeze_frames)
+
+    def put_passes(self, competition_ID, season_ID, match_id, passes_df):
+        """
+        save the passes for a match (plus its freeze frame side table if it has 360 data)
+        """
+        os.makedirs(self._season_dir(competition_ID, season_ID), exist_ok=True)
+        flat_df, freeze_frames = encode_passes(passes_df)
+        flat_df.to_parquet(self._path(competition_ID, season_ID, match_id))
+        if freeze_frames is not None:
+            freeze_frames.to_parquet(self._path(competition_ID, season_ID, f"{match_id}_360"))
+
+    def get_three_sixty(self, competition_ID, season_ID, match_id):
+        """
+        the 360 data of a cached match, rebuilt from its passes and freeze frame side table - only the columns needed
+        are read, so this is much cheaper than get_passes or the raw 360 file
+        :return: dict, {event id: {event_uuid, visible_area, freeze_frame}} as open_data.three_sixty_lookup returns
+        (empty if the match has no 360 data), or None if the match isn't cached
+        """
+        path = self._path(competition_ID, season_ID, match_id)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        ff_path = self._path(competition_ID, season_ID, f"{match_id}_360")
+        if not os.path.exists(ff_path):
+            return {}
+        passes_df = pd.read_parquet(path, columns=["id", "event_uuid", "visible_area"])
+        freeze_frames = pd.read_parquet(ff_path)
+
+        frames = {}
+        for event_id, x, y, teammate, actor, keeper in freeze_frames.itertuples(index=False):
+            frames.setdefault(event_id, []).append({"teammate": bool(teammate), "actor": bool(actor),
+                                                    "keeper": bool(keeper), "location": [x, y]})
+        threesixty = {}
+        for event_id, event_uuid, visible_area in passes_df.itertuples(index=False):
+            if isinstance(event_uuid, str):
+                threesixty[event_id] = {"event_uuid": event_uuid,
+                                        "visible_area": visible_area.tolist() if isinstance(visible_area, np.ndarray)
+                                        else visible_area,
+                                        "freeze_frame": frames.get(event_id, np.nan)}
+
+        return threesixty
+
+    def get_outcomes(self, competition_ID, season_ID, match_id):
+        """
+        :return: dataframe, cached outcome events (shots and turnovers) for the match, or None if they aren't cached
+        """
+        path = self._path(competition_ID, season_ID, f"{match_id}_outcomes")
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return pd.read_parquet(path)
+
+    def put_outcomes(self, competition_ID, season_ID, match_id, outcomes_df):
+        """
+        save the outcome events of a match (see outcomes.outcome_events)
+        """
+        os.makedirs(self._season_dir(competition_ID, season_ID), exist_ok=True)
+        outcomes_df.to_parquet(self._path(competition_ID, season_ID, f"{match_id}_outcomes"))
+
+    def invalidate(self, competition_ID=None, season_ID=None, match_id=None):
+        """
+        delete cached entries for the current schema version - a match, a whole season, a whole competition or everything
+        """
+        if match_id is not None:
+            for name in [match_id, f"{match_id}_360", f"{match_id}_outcomes"]:
+                path = self._path(competition_ID, season_ID, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+
+        path = os.path.join(self.cache_dir, f"v{self.schema_version}")
+        if competition_ID is not None:
+            path = os.path.join(path, str(competition_ID))
+            if season_ID is not None:
+                path = os.path.join(path, str(season_ID))
+        shutil.rmtree(path, ignore_errors=True)
+
+    def clear_stale(self):
+        """
+        delete everything cached under other schema versions
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("v") and name != f"v{self.schema_version}":
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def stats(self):
+        """
+        :return: dict, number of cache hits and misses so far
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+    def report(self):
+        """
+        print how many lookups were served from the cache
+        """
+        total = self.hits + self.misses
+        print(f"cache {self.cache_dir} (v{self.schema_version}): {self.hits} hits, {self.misses} misses from {total} lookups")
+
+
+def match_version(match):
+    """
+    StatsBomb bumps last_updated (and last_updated_360) whenever a match's data changes
+    :param match: dict, a row of the match list
+    :return: str, changes whenever the match's data does
+    """
+    return f"{match.get('last_updated')}|{match.get('last_updated_360')}"
+
+
+def encode_passes(passes_df):
+    """
+    flatten a pass dataframe into Parquet friendly columns
+    :param passes_df: dataframe, event (and 360) data of passes
+    :return: tuple, (flattened dataframe, freeze frame side table or None)
+    """
+    # keep the original row labels (StatsBomb frames already have an "index" column)
+    flat_df = passes_df.reset_index(drop=True)
+    flat_df.insert(0, INDEX_COLUMN, passes_df.index)
+
+    # coordinate lists -> one float column per axis
+    for col, n_axes in COORDINATE_COLUMNS.items():
+        if col not in flat_df.columns:
+            continue
+        coords = np.full((len(flat_df), n_axes), np.nan)
+        for i, loc in enumerate(flat_df[col]):
+            if isinstance(loc, (list, tuple, np.ndarray)):
+                coords[i, :len(loc)] = loc[:n_axes]
+        for k in range(n_axes):
+            flat_df[f"{col}_{AXES[k]}"] = coords[:, k]
+        flat_df = flat_df.drop(columns=[col])
+
+    # freeze frames -> one row per player in the frame, linked back by event id
+    freeze_frames = None
+    if FREEZE_FRAME_COLUMN in flat_df.columns:
+        rows = []
+        for event_id, frame in zip(flat_df["id"], flat_df[FREEZE_FRAME_COLUMN]):
+            if not isinstance(frame, (list, np.ndarray)):
+                continue
+            for player in frame:
+                rows.append({"id": event_id, "x": player["location"][0], "y": player["location"][1],
+                             "teammate": player["teammate"], "actor": player["actor"], "keeper": player["keeper"]})
+        freeze_frames = pd.DataFrame(rows, columns=["id", "x", "y", "teammate", "actor", "keeper"])
+        flat_df = flat_df.drop(columns=[FREEZE_FRAME_COLUMN])
+
+    return flat_df, freeze_frames
+
+
+def decode_passes(flat_df, freeze_frames=None):
+    """
+    rebuild a pass dataframe saved with encode_passes
+    :param flat_df: dataframe, flattened passes
+    :param freeze_frames: dataframe, freeze frame side table (or None)
+    :return: dataframe, passes with the usual StatsBomb list columns
+    """
+    passes_df = flat_df.set_index(INDEX_COLUMN)
+    passes_df.index.name = None
+
+    # one float column per axis -> coordinate lists
+    for col, n_axes in COORDINATE_COLUMNS.items():
+        axis_cols = [f"{col}_{AXES[k]}" for k in range(n_axes)]
+        if axis_cols[0] not in passes_df.columns:
+            continue
+        coords = passes_df[axis_cols].to_numpy()
+        # shot end locations don't always have a height
+        lengths = (~np.isnan(coords)).sum(axis=1)
+        passes_df[col] = [row[:n].tolist() if n > 0 else np.nan for row, n in zip(coords, lengths)]
+        passes_df = passes_df.drop(columns=axis_cols)
+
+    # side table -> freeze frame lists of dicts
+    if freeze_frames is not None:
+        frames = {}
+        for event_id, x, y, teammate, actor, keeper in freeze_frames.itertuples(index=False):
+            frames.setdefault(event_id, []).append({"teammate": bool(teammate), "actor": bool(actor),
+                                                    "keeper": bool(keeper), "location": [x, y]})
+        passes_df[FREEZE_FRAME_COLUMN] = [frames.get(event_id, np.nan) for event_id in passes_df["id"]]
+
+    return passes_df
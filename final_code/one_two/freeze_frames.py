@@ -0,0 +1,229 @@
+import os
+import numpy as np
+from one_two.functions import iter_match_passes
+
+# arrays saved for a store, one .npy file each
+ARRAYS = ["event_ids", "offsets", "positions", "teammate", "actor", "keeper"]
+
+
+class FreezeFrameStore:
+    """
+    packed version of the 360 freeze_frame column (a list of dicts per event) - every player of every frame in one
+    float32 array of positions, plus teammate/actor/keeper flag arrays
+    the players of the k-th event are rows offsets[k]:offsets[k + 1], so spatial queries over thousands of events
+    are a few numpy operations rather than a loop over dicts
+    """
+
+    def __init__(self, event_ids, offsets, positions, teammate, actor, keeper):
+        """
+        :param event_ids: array, event id (uuid str) of each frame
+        :param offsets: array, int64 of length n_frames + 1 - start of each frame's players (and the total at the end)
+        :param positions: array, float32 of shape (n_players, 2) - x, y of each player
+        :param teammate: array, bool - player is a teammate of the actor
+        :param actor: array, bool - player is the one making the pass
+        :param keeper: array, bool - player is a goalkeeper
+        """
+        self.event_ids = event_ids
+        self.offsets = offsets
+        self.positions = positions
+        self.teammate = teammate
+        self.actor = actor
+        self.keeper = keeper
+        self._rows = None
+
+    @classmethod
+    def from_frames(cls, event_ids, freeze_frames):
+        """
+        pack freeze frames as they come from StatsBomb (events without a frame are skipped)
+        :param event_ids: iterable, event ids
+        :param freeze_frames: iterable, freeze_frame values (list of dicts, or nan when the event has no frame)
+        :return: FreezeFrameStore
+        """
+        ids = []
+        sizes = []
+        xy = []
+        flags = []
+        for event_id, frame in zip(event_ids, freeze_frames):
+            if not isinstance(frame, (list, np.ndarray)):
+                continue
+            ids.append(event_id)
+            sizes.append(len(frame))
+            for player in frame:
+                xy.append(player["location"][:2])
+                flags.append((player["teammate"], player["actor"], player["keeper"]))
+
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        positions = np.asarray(xy, dtype=np.float32).reshape(-1, 2)
+        flags = np.asarray(flags, dtype=bool).reshape(-1, 3)
+
+        return cls(np.asarray(ids, dtype=str), offsets, positions, flags[:, 0].copy(), flags[:, 1].copy(),
+                   flags[:, 2].copy())
+
+    @classmethod
+    def from_passes(cls, passes_df):
+        """
+        :param passes_df: dataframe, passes with id and freeze_frame columns (as from load_match_passes)
+        :return: FreezeFrameStore
+        """
+        return cls.from_frames(passes_df["id"], passes_df["freeze_frame"])
+
+    @classmethod
+    def concat(cls, stores):
+        """
+        join several stores (e.g. one per match) into one
+        :param stores: list, of FreezeFrameStore
+        :return: FreezeFrameStore
+        """
+        stores = [store for store in stores if len(store) > 0]
+        if len(stores) == 0:
+            return cls.from_frames([], [])
+
+        # shift each store's offsets past the players of the stores before it
+        starts = np.cumsum([0] + [len(store.positions) for store in stores[:-1]])
+        offsets = np.concatenate([[0]] + [store.offsets[1:] + start for store, start in zip(stores, starts)])
+
+        return cls(np.concatenate([store.event_ids for store in stores]), offsets.astype(np.int64),
+                   np.concatenate([store.positions for store in stores]),
+                   np.concatenate([store.teammate for store in stores]),
+                   np.concatenate([store.actor for store in stores]),
+                   np.concatenate([store.keeper for store in stores]))
+
+    def save(self, store_dir):
+        """
+        write each array to store_dir as a .npy file (which load can memory-map)
+        :param store_dir: str, folder to save to
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(store_dir, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, store_dir, mmap=True):
+        """
+        :param store_dir: str, folder the store was saved to
+        :param mmap: bool, if True memory-map the arrays instead of reading them into memory
+        :return: FreezeFrameStore
+        """
+        mmap_mode = "r" if mmap else None
+        return cls(*[np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS])
+
+    def rows_of(self, event_ids):
+        """
+        :param event_ids: iterable, event ids
+        :return: array, position of each event's frame in the store (-1 if it has no frame)
+        """
+        if self._rows is None:
+            self._rows = {event_id: k for k, event_id in enumerate(self.event_ids.tolist())}
+        return np.array([self._rows.get(event_id, -1) for event_id in event_ids], dtype=np.int64)
+
+    def players_of(self, rows):
+        """
+        every player of the given frames at once
+        :param rows: array, frame positions (from rows_of) - missing frames (-1) have no players
+        :return: tuple, (which entry of rows each player belongs to, index of each player in the store arrays)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        found = rows >= 0
+        starts = np.where(found, self.offsets[np.maximum(rows, 0)], 0)
+        sizes = np.where(found, self.offsets[np.maximum(rows, 0) + 1] - starts, 0)
+
+        owner = np.repeat(np.arange(len(rows)), sizes)
+        # position of each player within its frame, added to the frame's start
+        within = np.arange(owner.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+        return owner, starts[owner] + within
+
+    def count_near(self, event_ids, points, radius, opponents_only=True):
+        """
+        count the players within radius of a point in each event's frame, e.g. defenders near the closing pass
+        :param event_ids: iterable, event ids
+        :param points: array, shape (n, 2) - one point per event (e.g. the pass end location)
+        :param radius: float, distance in StatsBomb pitch units (yards)
+        :param opponents_only: bool, if True only count opponents of the passer
+        :return: array, float count per event (nan for events without a frame - unknown, not empty)
+        """
+        rows = self.rows_of(event_ids)
+        owner, player = self._select(rows, opponents_only)
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        dist = np.linalg.norm(self.positions[player] - points[owner], axis=1)
+
+        counts = np.bincount(owner[dist <= radius], minlength=len(points)).astype(float)
+        counts[rows < 0] = np.nan
+
+        return counts
+
+    def nearest_distance(self, event_ids, points, opponents_only=True):
+        """
+        distance from a point to the nearest player in each event's frame
+        :param event_ids: iterable, event ids
+        :param points: array, shape (n, 2) - one point per event
+        :param opponents_only: bool, if True only consider opponents of the passer
+        :return: array, distance per event (nan for events without a frame, or with nobody in it)
+        """
+        owner, player = self._select(self.rows_of(event_ids), opponents_only)
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        dist = np.linalg.norm(self.positions[player] - points[owner], axis=1)
+
+        nearest = np.full(len(points), np.inf)
+        np.minimum.at(nearest, owner, dist)
+        nearest[np.isinf(nearest)] = np.nan
+
+        return nearest
+
+    def _select(self, rows, opponents_only):
+        owner, player = self.players_of(rows)
+        if opponents_only:
+            keep = ~np.asarray(self.teammate)[player]
+            owner = owner[keep]
+            player = player[keep]
+        return owner, player
+
+    def frame(self, event_id):
+        """
+        unpack one event's frame back into the StatsBomb list of dicts (e.g. for plot_match_one_twos)
+        :param event_id: str, event id
+        :return: list, of player dicts (or nan if the event has no frame)
+        """
+        row = self.rows_of([event_id])[0]
+        if row < 0:
+            return np.nan
+        return [{"teammate": bool(self.teammate[i]), "actor": bool(self.actor[i]), "keeper": bool(self.keeper[i]),
+                 "location": self.positions[i].tolist()} for i in range(self.offsets[row], self.offsets[row + 1])]
+
+    def memory_usage(self):
+        """
+        :return: int, bytes used by the arrays
+        """
+        return int(sum(getattr(self, name).nbytes for name in ARRAYS))
+
+    def __len__(self):
+        return len(self.event_ids)
+
+    def __repr__(self):
+        return f"FreezeFrameStore({len(self)} frames, {len(self.positions)} players)"
+
+
+def build_freeze_frame_store(competition_ID, season_IDs, data_path, store_dir, cache=None, open_data_path=None):
+    """
+    pack the freeze frames of every completed pass in a competition into one store and save it
+    (load it back with FreezeFrameStore.load(store_dir))
+    :param competition_ID: int, id number of competition
+    :param season_IDs: list, id numbers of the seasons to include
+    :param data_path: str, path to 360 data
+    :param store_dir: str, folder to save the store to (e.g. one per competition)
+    :param cache: PassCache, optional on-disk cache of the pass data (see one_two.cache)
+    :param open_data_path: str, optional path to a local open-data clone (see get_pass_data)
+    :return: FreezeFrameStore
+    """
+    stores = []
+    for season_ID in season_IDs:
+        for _, passes_df in iter_match_passes(competition_ID, season_ID, None, data_path, all_teams=True, cache=cache,
+                                              columns=["id", "freeze_frame"], open_data_path=open_data_path):
+            if "freeze_frame" in passes_df.columns:
+                stores.append(FreezeFrameStore.from_passes(passes_df))
+
+    store = FreezeFrameStore.concat(stores)
+    store.save(store_dir)
+
+    return store
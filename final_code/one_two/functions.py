@@ -1,31 +1,39 @@
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import pandas as pd
 import seaborn as sns
 from mplsoccer import Pitch
 from statsbombpy import sb
 import numpy as np
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from one_two.pairs import OneTwoPairs
+from one_two.heatmaps import one_two_grids, bin_edges, BINS
+from one_two.outcomes import outcome_events
+from one_two import open_data, profiling
 
 # TODO set plot parameters up here to make it the same across all plots
 
 # data functions
-def get_player_one_twos(player, data):
+def get_player_one_twos(player, data, index=None):
     """
     Given a dataframe of one-two passes, filter it to return only one-twos involving specified player
     :param player: str, the name of the player to filter by
     :param data: dataframe, a df of one-two passes (for match, season, team, etc ...)
+    :param index: dict, optional player index of data from build_player_index - use it when looking up many players
     :return: dataframe, the original dataframe filtered for player
     """
+    # no one-twos (may not even have the player columns)
+    if len(data) == 0:
+        return data
 
-    # intialise list to store indices
-    idx = []
-
-    # loop through all one-twos
-    for i in range(len(data)):
-        player1 = data["player"].iloc[i]
-        player2 = data["pass_recipient"].iloc[i]
-
-        if player1 == player or player2 == player:
-            idx.append(i)
+    # rows where player is the passer or the recipient
+    if index is None:
+        idx = np.flatnonzero((data["player"] == player).to_numpy() | (data["pass_recipient"] == player).to_numpy())
+    else:
+        idx = index.get(player, np.array([], dtype=int))
 
     # filter by selected indices
     data = data.iloc[idx, :]
@@ -33,7 +41,51 @@ def get_player_one_twos(player, data):
     return data
 
 
-def get_season_one_twos(comp, season, path, s, p, c):
+def build_player_index(data):
+    """
+    index a dataframe of one-two passes by player, so each player's one-twos can be found without scanning every row
+    :param data: dataframe, a df of one-two passes
+    :return: dict, {player: sorted array of row positions where they are the passer or the recipient}
+    """
+    if len(data) == 0:
+        return {}
+
+    # label every passer and recipient with an integer code
+    codes, players = pd.factorize(pd.concat([data["player"], data["pass_recipient"]], ignore_index=True))
+    positions = np.tile(np.arange(len(data)), 2)
+    named = codes >= 0
+    codes = codes[named]
+    positions = positions[named]
+
+    # sort by player then row, and only count a row once per player
+    order = np.lexsort((positions, codes))
+    codes = codes[order]
+    positions = positions[order]
+    repeated = np.r_[False, (codes[1:] == codes[:-1]) & (positions[1:] == positions[:-1])]
+    codes = codes[~repeated]
+    positions = positions[~repeated]
+
+    # each player's rows are now one contiguous block
+    bounds = np.searchsorted(codes, np.arange(len(players) + 1))
+
+    return {player: positions[bounds[k]:bounds[k + 1]] for k, player in enumerate(players)}
+
+
+def get_all_player_one_twos(data, index=None):
+    """
+    split a dataframe of one-two passes into the one-twos of every player involved
+    :param data: dataframe, a df of one-two passes
+    :param index: dict, optional player index of data from build_player_index
+    :return: dict, {player: dataframe of the one-twos involving them}
+    """
+    if index is None:
+        index = build_player_index(data)
+
+    return {player: data.iloc[idx, :] for player, idx in index.items()}
+
+
+def get_season_one_twos(comp, season, path, s, p, c, cache=None, workers=1, chunksize=1, columns=None,
+                        open_data_path=None, by_possession=False):
     """
     get all one-two passes for all teams from specified season of competition
     see attached report for explanation of thresholds
@@ -43,98 +95,278 @@ def get_season_one_twos(comp, season, path, s, p, c):
     :param s: float, time threshold for defining one-two pass
     :param p: float, progression threshold for defining one-two pass
     :param c: float, carry threshold for defining one-two passes
-    :return: dataframe, one-two passes for season
+    :param cache: PassCache, optional on-disk cache of the pass data (see one_two.cache)
+    :param workers: int, number of processes to load and search the matches with (1 = serial, None = one per core)
+    :param chunksize: int, number of matches sent to a worker at a time
+    :param columns: list, optional columns to keep (e.g. PASS_COLUMNS) - see project_passes
+    :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data repository -
+    matches, events and 360 data are read from there instead of through statsbombpy
+    :param by_possession: bool, if True only pair passes from the same possession and period (see get_one_twos)
+    :return: dataframe, one-two passes for season (in match order whichever way it was run)
     """
+    if workers is None or workers > 1:
+        one_two_agg = _get_season_one_twos_parallel(comp, season, path, s, p, c, cache, workers, chunksize, columns,
+                                                    open_data_path, by_possession)
+        if one_two_agg is not None:
+            return one_two_agg
 
-    # get all passes per match
-    all_matches_passes = get_pass_data(comp, season, None, path, all_teams=True)
+    # load each match and get only its one-two passes, then store in single dataframe
+    one_two_agg = collect_one_twos(iter_one_twos(comp, season, None, path, all_teams=True, cache=cache,
+                                                 sec_threshold=s, prog_threshold=p, carry_threshold=c, columns=columns,
+                                                 open_data_path=open_data_path, by_possession=by_possession))
+
+    return one_two_agg
 
-    # then get only the one-two passes and store in single dataframe
-    one_two_agg = pd.DataFrame([])
-    for key in all_matches_passes.keys():
-        match_one_twos = get_one_twos(all_matches_passes[key], sec_threshold=s, prog_threshold=p, carry_threshold=c)
-        one_two_agg = pd.concat([one_two_agg, match_one_twos], axis=0)
+
+def _get_season_one_twos_parallel(comp, season, path, s, p, c, cache, workers, chunksize, columns, open_data_path,
+                                  by_possession=False):
+    """
+    get_season_one_twos with the load + detect step for each match run in a process pool
+    :return: dataframe, one-two passes for season (None if the process pool couldn't be used)
+    """
+    match_ids = get_matches(comp, season, cache=cache, open_data_path=open_data_path)["match_id"]
+    jobs = [(comp, season, match_id, path, s, p, c, cache, columns, open_data_path, by_possession)
+            for match_id in match_ids]
+
+    # results come back in match order
+    results = _pool_map(_match_one_twos, jobs, workers, chunksize=chunksize)
+    if results is None:
+        return None
+
+    # workers have their own copy of the cache, so add their hits and misses to ours
+    if cache is not None:
+        for _, cache_hit in results:
+            cache.hits += int(cache_hit)
+            cache.misses += int(not cache_hit)
+
+    # same match id keys as get_pass_data
+    one_two_agg = collect_one_twos((str(match_id), match_one_twos)
+                                   for match_id, (match_one_twos, _) in zip(match_ids, results))
 
     return one_two_agg
 
 
+def _match_one_twos(job):
+    """
+    process pool worker - load the passes for one match and find its one-twos
+    :param job: tuple, (comp, season, match_id, path, s, p, c, cache, columns, open_data_path, by_possession)
+    :return: tuple, (one-twos dataframe, whether the passes came from the cache)
+    """
+    comp, season, match_id, path, s, p, c, cache, columns, open_data_path, by_possession = job
+    # same as iter_match_passes - no need to read the 360 file if the freeze frames are projected away
+    passes_df, cache_hit = _get_match_passes(comp, season, match_id, path, cache, open_data_path,
+                                             with_360=columns is None or "freeze_frame" in columns)
+    if columns is not None:
+        passes_df = project_passes(passes_df, columns)
+
+    return get_one_twos(passes_df, sec_threshold=s, prog_threshold=p, carry_threshold=c,
+                        by_possession=by_possession), cache_hit
+
+
+def collect_one_twos(frames):
+    """
+    combine per-match one-two dataframes into a single dataframe with one concatenation
+    (growing a dataframe with pd.concat inside a loop copies every earlier row each time)
+    :param frames: dict of {match_id: dataframe}, or an iterable (e.g. a generator) of (match_id, dataframe) pairs or
+    of dataframes - bare dataframes are keyed by their match_id column
+    :return: dataframe, all one-twos indexed by (match, event_index) - the level is called match rather than match_id so
+    it doesn't clash with the match_id column of the passes
+    """
+    if isinstance(frames, dict):
+        frames = frames.items()
+
+    match_ids = []
+    dfs = []
+    for i, item in enumerate(frames):
+        if isinstance(item, tuple):
+            match_id, df = item
+        else:
+            df = item
+            match_id = df["match_id"].iloc[0] if "match_id" in df.columns and len(df) > 0 else i
+
+        # matches with no one-twos come back as an empty frame with no columns
+        if len(df) == 0:
+            continue
+        match_ids.append(match_id)
+        dfs.append(df)
+
+    if len(dfs) == 0:
+        return pd.DataFrame([])
+
+    with profiling.stage("collect", rows=sum(len(df) for df in dfs)):
+        return pd.concat(_unify_categories(dfs), axis=0, keys=match_ids, names=["match", "event_index"])
+
+
+def _unify_categories(dfs):
+    """
+    give categorical columns the same categories in every frame, otherwise pd.concat turns them back into objects
+    :param dfs: list, of dataframes
+    :return: list, of dataframes
+    """
+    shared = set.intersection(*[set(df.select_dtypes("category").columns) for df in dfs])
+    if len(shared) == 0:
+        return dfs
+
+    dfs = [df.copy() for df in dfs]
+    for col in shared:
+        categories = pd.api.types.union_categoricals([df[col] for df in dfs]).categories
+        for df in dfs:
+            df[col] = df[col].cat.set_categories(categories)
+
+    return dfs
+
+
 def key_one_two_percentage(data):
     """
     calculate how many one-twos lead to a shot or goal as a percentage
-    TODO tidy up the try/except loop (check existence of col instead ?)
     :param data: dataframe, one-twos
-    :return:
+    :return: float, percentage of the one-twos that are key passes
     """
-    try:
-        shot_assists = data.pass_shot_assist.value_counts().iloc[0]
-    except Exception:
-        shot_assists = 0
-    try:
-        goal_assists = data.pass_goal_assist.value_counts().iloc[0]
-    except Exception:
-        goal_assists = 0
+    shot_assists = _count_flag(data, "pass_shot_assist")
+    goal_assists = _count_flag(data, "pass_goal_assist")
 
     key_pass_pc = 100*(shot_assists + goal_assists)/(0.5*len(data))
 
     return key_pass_pc
 
 
+def _count_flag(data, col):
+    """
+    count the rows where a StatsBomb True/missing flag column is set (0 if the column isn't there at all,
+    which happens when no pass in the data was e.g. a goal assist)
+    """
+    if col not in data.columns:
+        return 0
+    return int(data[col].eq(True).sum())
+
+
 def get_player_counts(data_agg):
     """
     given all one-twos for season/comp, return a dataframe of stats for each player involved in one-twos
     :param data_agg: dataframe, contains one-two passes (e.g. per season, per comptetition etc ...)
     :return: dataframe, df of stats per player with number of one-twos total, number opened/closed, and key percentage
     """
-    # split into opening and closing passes
-    # TODO could go straight to merged dataframe here (don't need separate ones anymore)
-    open_agg = data_agg.iloc[::2, :]
-    close_agg = data_agg.iloc[1::2, :]
-
-    # then count number of one-twos for each player
-    open_counts = open_agg.player.value_counts()
-    open_counts = open_counts.reset_index()
-    close_counts = close_agg.player.value_counts()
-    close_counts = close_counts.reset_index()
-
-    # add team info
-    open_counts = get_team_info(open_counts, open_agg)
-    close_counts = get_team_info(close_counts, close_agg)
-
-    # combine open and close for stacked plot
-    one_two_counts = open_counts.merge(close_counts, on="player", how="outer").rename(
-        columns={"count_x": "open_count", "count_y": "close_count", "team_x": "team"})
-    one_two_counts = one_two_counts.drop(columns=["team_y"])
-    # add a total count col
+    with profiling.stage("player counts", rows=len(data_agg)):
+        return _finish_player_counts(_player_count_parts(data_agg))
+
+
+def _player_count_parts(data_agg):
+    """
+    tag every one-two as opened/closed by its two players - one row per player per one-two
+    the counts can be summed across matches (see _finish_player_counts)
+    :param data_agg: dataframe (opening and closing pass in consecutive rows) or OneTwoPairs, one-two passes
+    :return: dataframe, columns player, team, open_count, close_count, key_count
+    """
+    if len(data_agg) < 2 and not isinstance(data_agg, OneTwoPairs):
+        return pd.DataFrame(columns=["player", "team", "open_count", "close_count", "key_count"])
+
+    # one row per one-two
+    pair_data = OneTwoPairs.coerce(data_agg).data
+    n_pairs = len(pair_data)
+
+    # a one-two is a key pass if either pass is a shot or goal assist
+    key_count = (pair_data[["open_shot_assist", "open_goal_assist", "close_shot_assist",
+                            "close_goal_assist"]].to_numpy().sum(axis=1))
+
+    # both players are involved in the one-two, once as opener and once as closer
+    ones = np.ones(n_pairs, dtype=int)
+    zeros = np.zeros(n_pairs, dtype=int)
+    team = pair_data["team"].to_numpy(dtype=object)
+    opened = pd.DataFrame({"player": pair_data["opener"].to_numpy(dtype=object), "team": team, "open_count": ones,
+                           "close_count": zeros, "key_count": key_count})
+    closed = pd.DataFrame({"player": pair_data["closer"].to_numpy(dtype=object), "team": team, "open_count": zeros,
+                           "close_count": ones, "key_count": key_count})
+
+    return pd.concat([opened, closed], ignore_index=True)
+
+
+def _finish_player_counts(parts):
+    """
+    add up the per one-two rows from _player_count_parts into one row of stats per player
+    :param parts: dataframe, output of _player_count_parts (or several of them concatenated)
+    :return: dataframe, columns player, open_count, team, close_count, total_count, key_pc (sorted by player)
+    """
+    # team is taken from the first one-two the player opened (or closed if they never opened one)
+    one_two_counts = parts.groupby("player", sort=True).agg(open_count=("open_count", "sum"), team=("team", "first"),
+                                                            close_count=("close_count", "sum"),
+                                                            key_count=("key_count", "sum")).reset_index()
     one_two_counts["total_count"] = one_two_counts["open_count"] + one_two_counts["close_count"]
 
-    # then find key pass percentage ...
-    player_data = {}
-    pcs = []
-    for player in one_two_counts["player"]:
-        player_data[player] = get_player_one_twos(player, data_agg)
-        pc = key_one_two_percentage(player_data[player])
-        pcs.append(pc)
+    # key pass percentage of all the one-twos the player was involved in
+    one_two_counts["key_pc"] = 100*one_two_counts["key_count"]/one_two_counts["total_count"]
+
+    return one_two_counts.drop(columns=["key_count"])
 
-    one_two_counts["key_pc"] = pcs
-    return one_two_counts
 
+# columns needed for one-two detection and player stats (see project_passes)
+PASS_COLUMNS = ["id", "match_id", "period", "possession", "minute", "second", "player", "pass_recipient", "team",
+                "possession_team", "location", "pass_end_location", "pass_outcome", "pass_shot_assist",
+                "pass_goal_assist"]
 
-def get_pass_data(competition_ID, season_ID, team, data_path, all_teams=False):
+# dtypes of the projected columns
+CATEGORY_COLUMNS = ["player", "pass_recipient", "team", "possession_team"]
+FLAG_COLUMNS = ["pass_shot_assist", "pass_goal_assist"]
+INT_COLUMNS = {"period": "int8", "possession": "int16", "minute": "int16", "second": "int16"}
+
+
+def get_pass_data(competition_ID, season_ID, team, data_path, all_teams=False, cache=None, columns=None,
+                  open_data_path=None, with_outcomes=False):
     """
     get all pass info (event data plus 360 data) for specified competition and season, for specified HOME team only
+    holds every match in memory at once - use iter_match_passes to work through them one at a time
     :param competition_ID: int, id number of competition
     :param season_ID: int, id number of season
     :param team: str, required team name
     :param data_path: str, path to 360 data
-    :return: dict, dictionary of pd dataframes with all pass data for team from season and competition
+    :param cache: PassCache, optional on-disk cache (see one_two.cache) - matches found there are not re-downloaded
+    :param columns: list, optional columns to keep (e.g. PASS_COLUMNS) - see project_passes
+    :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data repository -
+    matches, events and 360 data are read from there instead of through statsbombpy
+    :param with_outcomes: bool, if True also return each match's shots and turnovers (see outcomes.outcome_events),
+    taken from the same events as the passes
+    :return: dict, dictionary of pd dataframes with all pass data for team from season and competition (and a second
+    dict of outcome events with with_outcomes)
+    """
+    if with_outcomes:
+        all_passes, all_outcomes = {}, {}
+        for match_id, passes_df, outcomes_df in iter_match_passes(competition_ID, season_ID, team, data_path,
+                                                                  all_teams=all_teams, cache=cache, columns=columns,
+                                                                  open_data_path=open_data_path, with_outcomes=True):
+            all_passes[match_id] = passes_df
+            all_outcomes[match_id] = outcomes_df
+        return all_passes, all_outcomes
+
+    # store each dataframe of passing data in a dict (key=match id)
+    all_passes = dict(iter_match_passes(competition_ID, season_ID, team, data_path, all_teams=all_teams, cache=cache,
+                                        columns=columns, open_data_path=open_data_path))
+
+    return all_passes
+
+
+def iter_match_passes(competition_ID, season_ID, team, data_path, all_teams=False, cache=None, columns=None,
+                      open_data_path=None, read_workers=8, with_outcomes=False):
+    """
+    generator version of get_pass_data - loads the matches one at a time so only one is held in memory
+    :param competition_ID: int, id number of competition
+    :param season_ID: int, id number of season
+    :param team: str, required team name
+    :param data_path: str, path to 360 data
+    :param all_teams: bool, if True get every match (and both teams' passes) instead of just the team's
+    :param cache: PassCache, optional on-disk cache (see one_two.cache)
+    :param columns: list, optional columns to keep (e.g. PASS_COLUMNS) - see project_passes
+    :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data repository -
+    matches, events and 360 data are read from there instead of through statsbombpy
+    :param read_workers: int, number of threads reading match files ahead when using open_data_path
+    :param with_outcomes: bool, if True also yield the match's shots and turnovers (see outcomes.outcome_events) for
+    outcomes.attribute_outcomes, taken from the same events as the passes (every event of the match, whatever team)
+    :return: generator, of (match_id, passes dataframe) pairs - match_id is a str as in get_pass_data - or
+    (match_id, passes dataframe, outcome events dataframe) with with_outcomes
     """
 
     # load all matches from specified competition and season
-    matches_df = sb.matches(competition_id=competition_ID, season_id=season_ID)
+    matches_df = get_matches(competition_ID, season_ID, cache=cache, open_data_path=open_data_path)
 
-    # TODO check how to store apostrophes in json string so I can get rid of this bit
-    if competition_ID==53:
-        team = f"{team} Women's"
+    team = statsbomb_team_name(competition_ID, team)
 
     # get id number of all matches played by specified team (home & away) or by everyone if all_teams is true
     if all_teams:
@@ -143,34 +375,330 @@ def get_pass_data(competition_ID, season_ID, team, data_path, all_teams=False):
         match_ids = np.concatenate([np.array(matches_df[matches_df["home_team"] == team]["match_id"]),
                                     np.array(matches_df[matches_df["away_team"] == team]["match_id"])])
 
-    # loop through all matches
-    all_passes = {}
-    for matchid in match_ids:
-        # get event data ...
-        events = sb.events(match_id=matchid)
-        # ... and get 360 data if it exists ...
-        if competition_ID==53:
-            threesixty = pd.read_json(f"{data_path}/{matchid}.json")
-
-            # ... merge into single dataframe
-            df = pd.merge(left=events, right=threesixty, left_on='id', right_on='event_uuid', how='left')
-        else:
-            df = events
+    # no need to read the 360 files if the freeze frames are about to be projected away
+    with_360 = columns is None or "freeze_frame" in columns
 
-        # now filter for passes (completed passes only) ...
-        passes_df = df.dropna(subset=["pass_recipient"])
-        passes_df = passes_df[passes_df["pass_outcome"].isna()]
+    # loop through all matches - local files are read a few matches ahead on a thread pool
+    def load(matchid):
+        # (passes, outcome events) or just (passes,), without the cache hit flag
+        return _get_match_passes(competition_ID, season_ID, matchid, data_path, cache, open_data_path,
+                                 with_360=with_360, with_outcomes=with_outcomes)[:-1]
+
+    if open_data_path is not None:
+        all_loaded = open_data.iter_threaded(load, match_ids, workers=read_workers)
+    else:
+        all_loaded = (load(matchid) for matchid in match_ids)
 
+    for matchid, loaded in zip(match_ids, all_loaded):
+        passes_df = loaded[0]
         if not all_teams:
             # ... remove opposition's passes
             passes_df = passes_df[passes_df["team"]==team]
 
-        # store each dataframe of passing data in a dict (key=match id)
-        all_passes[str(matchid)] = passes_df
-    return all_passes
+        if columns is not None:
+            passes_df = project_passes(passes_df, columns)
+
+        if with_outcomes:
+            yield str(matchid), passes_df, loaded[1]
+        else:
+            yield str(matchid), passes_df
+
+
+def iter_match_outcomes(competition_ID, season_ID, data_path, cache=None, open_data_path=None):
+    """
+    the shots and turnovers of every match in a season (see outcomes.outcome_events), for outcomes.attribute_outcomes
+    with a cache they are saved whenever a match's events are loaded, so after get_pass_data/iter_match_passes has run
+    this is read straight from the cache without loading any events again (matches cached before the outcome events
+    were are loaded once more and cached)
+    without a cache every match's events are loaded again - to avoid that, get the outcomes from the same load as the
+    passes with get_pass_data/iter_match_passes(with_outcomes=True)
+    :param competition_ID: int, id number of competition
+    :param season_ID: int, id number of season
+    :param data_path: str, path to 360 data
+    :param cache: PassCache, optional on-disk cache (see one_two.cache)
+    :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data repository -
+    matches, events and 360 data are read from there instead of through statsbombpy
+    :return: generator, of (match_id, outcome events dataframe) pairs - match_id is a str as in get_pass_data
+    """
+    matches_df = get_matches(competition_ID, season_ID, cache=cache, open_data_path=open_data_path)
+
+    for matchid in matches_df["match_id"]:
+        outcomes_df = None
+        if cache is not None:
+            with profiling.stage("cache read", matchid):
+                outcomes_df = cache.get_outcomes(competition_ID, season_ID, matchid)
+
+        if outcomes_df is None:
+            _, outcomes_df, _ = _get_match_passes(competition_ID, season_ID, matchid, data_path, cache, open_data_path,
+                                                  with_360=False, with_outcomes=True)
+
+        yield str(matchid), outcomes_df
+
+
+def statsbomb_team_name(competition_ID, team):
+    """
+    :param competition_ID: int, id number of competition
+    :param team: str, team name as written in the input files
+    :return: str, team name as StatsBomb has it
+    """
+    # TODO check how to store apostrophes in json string so I can get rid of this bit
+    if competition_ID==53 and team is not None:
+        team = f"{team} Women's"
+
+    return team
+
+
+def iter_one_twos(competition_ID, season_ID, team, data_path, all_teams=False, cache=None, sec_threshold=5,
+                  prog_threshold=0.75, carry_threshold=5, columns=None, open_data_path=None, by_possession=False):
+    """
+    find the one-twos of each match as it is loaded, without keeping the passes of earlier matches
+    see attached report for info on thresholds
+    :param competition_ID: int, id number of competition
+    :param season_ID: int, id number of season
+    :param team: str, required team name
+    :param data_path: str, path to 360 data
+    :param all_teams: bool, if True get every match (and both teams' passes) instead of just the team's
+    :param cache: PassCache, optional on-disk cache (see one_two.cache)
+    :param sec_threshold: float, time threshold for defining one-two pass
+    :param prog_threshold: float, progression threshold for defining one-two pass
+    :param carry_threshold: float, carry threshold for defining one-two passes
+    :param columns: list, optional columns to keep (e.g. PASS_COLUMNS) - see project_passes
+    :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data repository -
+    matches, events and 360 data are read from there instead of through statsbombpy
+    :param by_possession: bool, if True only pair passes from the same possession and period (see get_one_twos)
+    :return: generator, of (match_id, one-twos dataframe) pairs
+    """
+    for match_id, passes_df in iter_match_passes(competition_ID, season_ID, team, data_path, all_teams=all_teams,
+                                                 cache=cache, columns=columns, open_data_path=open_data_path):
+        yield match_id, get_one_twos(passes_df, sec_threshold=sec_threshold, prog_threshold=prog_threshold,
+                                     carry_threshold=carry_threshold, by_possession=by_possession)
+
+
+def project_passes(passes_df, columns=PASS_COLUMNS):
+    """
+    cut a pass dataframe down to the given columns with compact dtypes: player/team names become categoricals,
+    location/pass_end_location become float32 x_start, y_start, x_end, y_end columns, assist flags become bools
+    :param passes_df: dataframe, passes as loaded by iter_match_passes
+    :param columns: list, columns to keep (any that don't exist in this match are skipped)
+    :return: dataframe, projected passes
+    """
+    projected = passes_df[[col for col in columns if col in passes_df.columns]].copy()
+
+    # coordinate lists -> float32 columns
+    for col, names in [("location", ["x_start", "y_start"]), ("pass_end_location", ["x_end", "y_end"])]:
+        if col in projected.columns:
+            xy = _unpack_xy(projected[col]).astype(np.float32)
+            projected[names[0]] = xy[:, 0]
+            projected[names[1]] = xy[:, 1]
+            projected = projected.drop(columns=[col])
+
+    for col in projected.columns:
+        if col in CATEGORY_COLUMNS:
+            projected[col] = projected[col].astype("category")
+        elif col in FLAG_COLUMNS:
+            projected[col] = projected[col].eq(True)
+        elif col in INT_COLUMNS:
+            projected[col] = projected[col].astype(INT_COLUMNS[col])
+
+    return projected
+
+
+def _get_match_passes(competition_ID, season_ID, match_id, data_path, cache, open_data_path=None, with_360=True,
+                      with_outcomes=False):
+    """
+    get the passes for one match from the cache if they're there, otherwise load them (and cache them)
+    with_360=False skips reading the 360 file, but only without a cache - cached matches always keep their 360 data
+    with_outcomes=True also gets the match's outcome events (see outcomes.outcome_events) from the same load
+    :return: tuple, (passes dataframe, whether it came from the cache) - or (passes dataframe, outcome events
+    dataframe, whether they came from the cache) with with_outcomes
+    """
+    passes_df = None
+    outcomes_df = None
+    if cache is not None:
+        with profiling.stage("cache read", match_id):
+            passes_df = cache.get_passes(competition_ID, season_ID, match_id)
+            if with_outcomes and passes_df is not None:
+                outcomes_df = cache.get_outcomes(competition_ID, season_ID, match_id)
+    cache_hit = passes_df is not None and (outcomes_df is not None or not with_outcomes)
+
+    if not cache_hit:
+        if cache is None and not with_outcomes:
+            passes_df = load_match_passes(competition_ID, match_id, data_path, open_data_path=open_data_path,
+                                          with_360=with_360)
+        else:
+            # the outcome events are cached too while the full events are loaded (see iter_match_outcomes)
+            passes_df, outcomes_df = load_match_passes(competition_ID, match_id, data_path,
+                                                       open_data_path=open_data_path,
+                                                       with_360=with_360 or cache is not None, with_outcomes=True)
+            if cache is not None:
+                with profiling.stage("cache write", match_id, rows=len(passes_df)):
+                    cache.put_passes(competition_ID, season_ID, match_id, passes_df)
+                    cache.put_outcomes(competition_ID, season_ID, match_id, outcomes_df)
+
+    if with_outcomes:
+        return passes_df, outcomes_df, cache_hit
+    return passes_df, cache_hit
+
+
+def get_matches(competition_ID, season_ID, cache=None, open_data_path=None):
+    """
+    get the list of matches for a competition and season
+    :param competition_ID: int, id number of competition
+    :param season_ID: int, id number of season
+    :param cache: PassCache, optional on-disk cache (see one_two.cache) - the cached list is only fetched again if the
+    cache has a matches_max_age and the list is older, dropping cached passes of any match updated since
+    :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data repository -
+    matches, events and 360 data are read from there instead of through statsbombpy
+    :return: dataframe, one row per match (as returned by sb.matches)
+    """
+    matches_df = None
+    if cache is not None:
+        matches_df = cache.get_matches(competition_ID, season_ID)
+
+    if matches_df is None:
+        if open_data_path is not None:
+            matches_df = open_data.load_matches(open_data_path, competition_ID, season_ID)
+        else:
+            matches_df = sb.matches(competition_id=competition_ID, season_id=season_ID)
+        if cache is not None:
+            cache.put_matches(competition_ID, season_ID, matches_df)
+
+    return matches_df
 
 
-def get_one_twos(match, sec_threshold=5, prog_threshold=0.75, carry_threshold=5):
+def load_match_passes(competition_ID, match_id, data_path, open_data_path=None, with_360=True, with_outcomes=False):
+    """
+    load the completed passes (for both teams) of a single match, with 360 data added if it exists
+    :param competition_ID: int, id number of competition
+    :param match_id: int, id number of match
+    :param data_path: str, path to 360 data
+    :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data repository -
+    matches, events and 360 data are read from there instead of through statsbombpy
+    :param with_360: bool, if False don't add the 360 data (it can be added to just the one-twos with
+    attach_freeze_frames instead)
+    :param with_outcomes: bool, if True also return the match's shots and turnovers (see outcomes.outcome_events)
+    :return: dataframe, event and 360 data of completed passes (and the outcome events dataframe if with_outcomes)
+    """
+    # get event data ...
+    with profiling.stage("fetch events", match_id) as record:
+        if open_data_path is not None:
+            events = open_data.load_events(open_data_path, match_id)
+        else:
+            events = sb.events(match_id=match_id)
+        record["rows"] = len(events)
+
+    # ... filter for passes (completed passes only) ...
+    passes_df = events.dropna(subset=["pass_recipient"])
+    passes_df = passes_df[passes_df["pass_outcome"].isna()]
+
+    # ... and add the 360 data of those passes if the match has it
+    if with_360:
+        with profiling.stage("add 360", match_id, rows=len(passes_df)):
+            threesixty = _read_three_sixty(match_id, data_path, open_data_path)
+            if threesixty is not None:
+                passes_df = _add_three_sixty(passes_df, threesixty)
+
+    if with_outcomes:
+        return passes_df, outcome_events(events)
+    return passes_df
+
+
+def attach_freeze_frames(one_twos, data_path, open_data_path=None, closers_only=True, cache=None, competition_ID=None,
+                         season_ID=None):
+    """
+    add 360 data to one-twos found from passes loaded without it (e.g. projected passes), reading each match's 360
+    data once and only keeping the frames of the one-two passes - from the cache's freeze frame side table for matches
+    it holds, otherwise from the 360 file
+    :param one_twos: dataframe, one-two passes (e.g. from collect_one_twos) with an id column and match ids
+    :param data_path: str, path to 360 data
+    :param open_data_path: str, optional path to a local open-data clone (see get_pass_data)
+    :param closers_only: bool, if True only the closing passes get their freeze frame (that's all the plots use)
+    :param cache: PassCache, optional on-disk cache (see one_two.cache) the passes were loaded through
+    :param competition_ID: int, id number of competition (needed with a cache)
+    :param season_ID: int, id number of season (needed with a cache)
+    :return: dataframe, one-twos with event_uuid, visible_area and freeze_frame columns
+    """
+    if len(one_twos) == 0:
+        return one_twos
+
+    # closing passes are every second row
+    wanted = np.ones(len(one_twos), dtype=bool)
+    if closers_only:
+        wanted[0::2] = False
+
+    # match id from the column, or from the (match, event_index) index of collect_one_twos
+    if "match_id" in one_twos.columns:
+        match_ids = one_twos["match_id"].to_numpy()
+    else:
+        match_ids = one_twos.index.get_level_values("match").to_numpy()
+
+    event_uuid = np.full(len(one_twos), np.nan, dtype=object)
+    visible_area = np.full(len(one_twos), np.nan, dtype=object)
+    freeze_frame = np.full(len(one_twos), np.nan, dtype=object)
+    for match_id in pd.unique(match_ids):
+        threesixty = None
+        if cache is not None:
+            with profiling.stage("cache read 360", match_id):
+                threesixty = cache.get_three_sixty(competition_ID, season_ID, match_id)
+        if threesixty is None:
+            threesixty = _read_three_sixty(match_id, data_path, open_data_path)
+        if threesixty is None:
+            continue
+        rows = np.flatnonzero((match_ids == match_id) & wanted)
+        found = _lookup_three_sixty(one_twos["id"].iloc[rows], threesixty)
+        for values, col in zip(found, [event_uuid, visible_area, freeze_frame]):
+            col[rows] = pd.Series(values, dtype=object).to_numpy()
+
+    one_twos = one_twos.copy()
+    one_twos["event_uuid"] = event_uuid
+    one_twos["visible_area"] = visible_area
+    one_twos["freeze_frame"] = freeze_frame
+
+    return one_twos
+
+
+def _read_three_sixty(match_id, data_path, open_data_path=None):
+    """
+    read a match's 360 data if there is any - whether it exists decides, not the competition
+    :return: dict, {event id: 360 record} or None
+    """
+    if open_data_path is not None:
+        return open_data.load_three_sixty(open_data_path, match_id)
+    if data_path and os.path.exists(f"{data_path}/{match_id}.json"):
+        return open_data.three_sixty_lookup(f"{data_path}/{match_id}.json")
+    return None
+
+
+def _add_three_sixty(passes_df, threesixty):
+    """
+    add the 360 columns to passes by looking each pass up by event id
+    (same columns as the left merge on event_uuid this replaces)
+    """
+    event_uuid, visible_area, freeze_frame = _lookup_three_sixty(passes_df["id"], threesixty)
+    passes_df = passes_df.copy()
+    passes_df["event_uuid"] = event_uuid
+    passes_df["visible_area"] = pd.Series(visible_area, index=passes_df.index, dtype=object)
+    passes_df["freeze_frame"] = pd.Series(freeze_frame, index=passes_df.index, dtype=object)
+
+    return passes_df
+
+
+def _lookup_three_sixty(event_ids, threesixty):
+    """
+    :param event_ids: series, event ids to look up
+    :param threesixty: dict, {event id: 360 record} from _read_three_sixty
+    :return: tuple, of lists (event_uuid, visible_area, freeze_frame) - nan where the event has no 360 data
+    """
+    records = [threesixty.get(event_id) for event_id in event_ids]
+    event_uuid = [event_id if record is not None else np.nan for event_id, record in zip(event_ids, records)]
+    visible_area = [record["visible_area"] if record is not None else np.nan for record in records]
+    freeze_frame = [record["freeze_frame"] if record is not None else np.nan for record in records]
+
+    return event_uuid, visible_area, freeze_frame
+
+
+def get_one_twos(match, sec_threshold=5, prog_threshold=0.75, carry_threshold=5, method="vectorised",
+                 by_possession=False):
     """
     returns one-two data from passing data
     see attached report for info on thresholds
@@ -178,12 +706,52 @@ def get_one_twos(match, sec_threshold=5, prog_threshold=0.75, carry_threshold=5)
     :param sec_threshold: float, time threshold for defining one-two pass
     :param prog_threshold: float, progression threshold for defining one-two pass
     :param carry_threshold: float, carry threshold for defining one-two passes
+    :param method: str, "vectorised" (default) or "loop" for the original pass-by-pass search (same result, much slower,
+    and needs the location list columns so doesn't work on projected passes)
+    :param by_possession: bool, if True only pair passes from the same possession (and period), so a one-two can't
+    span a turnover or the two halves - needs the possession and period columns
     :return: dataframe, all one-twos found in passing data
     """
 
     # convert timestamp into seconds
     match["time_in_secs"] = match["minute"]*60 + match["second"]
 
+    # find the index of the opening and closing pass of every one-two
+    match_id = match["match_id"].iloc[0] if "match_id" in match.columns and len(match) > 0 else None
+    with profiling.stage("detect", match_id, rows=len(match)):
+        if method == "vectorised":
+            one_two_idx = _find_one_twos_vectorised(match, sec_threshold, prog_threshold, carry_threshold,
+                                                    by_possession)
+        elif method == "loop":
+            one_two_idx = _find_one_twos_loop(match, sec_threshold, prog_threshold, carry_threshold, by_possession)
+        else:
+            raise ValueError(f"unknown one-two detection method: {method}")
+
+    # select the one-twos from the original pass dataframe
+    all_onetwos = match.loc[np.array(one_two_idx).reshape(1,-1)[0]]
+
+    if len(one_two_idx) == 0:
+        # return empty frame and notify if none found
+        print("No one-twos found.")
+        return pd.DataFrame([])
+    elif "location" in all_onetwos.columns:
+        # make extra location columns for easier plotting (projected passes already have them)
+        all_onetwos[["x_start", "y_start"]] = pd.DataFrame(all_onetwos.location.tolist(), index=all_onetwos.index)
+        all_onetwos[["x_end", "y_end"]] = pd.DataFrame(all_onetwos.pass_end_location.tolist(), index=all_onetwos.index)
+
+    return all_onetwos
+
+
+def _find_one_twos_loop(match, sec_threshold, prog_threshold, carry_threshold, by_possession=False):
+    """
+    original pass-by-pass one-two search, kept as the reference for the vectorised version
+    :param match: dataframe, passes with a time_in_secs column
+    :param sec_threshold: float, time threshold for defining one-two pass
+    :param prog_threshold: float, progression threshold for defining one-two pass
+    :param carry_threshold: float, carry threshold for defining one-two passes
+    :param by_possession: bool, if True only look for return passes in the same possession and period
+    :return: list, [opening index, closing index] for each one-two
+    """
     # empty list to store index of one-two passes
     one_two_idx = []
 
@@ -196,6 +764,9 @@ def get_one_twos(match, sec_threshold=5, prog_threshold=0.75, carry_threshold=5)
         pass_time_sec = match["time_in_secs"].iloc[i]
         cutoff = pass_time_sec + sec_threshold
         next_passes_df = match[match["time_in_secs"].between(pass_time_sec, cutoff, inclusive="both")]
+        if by_possession:
+            next_passes_df = next_passes_df[(next_passes_df["possession"] == match["possession"].iloc[i]) &
+                                            (next_passes_df["period"] == match["period"].iloc[i])]
 
         # for every pass that happens in the next n seconds ...
         for j in range(len(next_passes_df)):
@@ -223,20 +794,136 @@ def get_one_twos(match, sec_threshold=5, prog_threshold=0.75, carry_threshold=5)
                 elif end_goal_dist < start_goal_dist*prog_threshold and pass_dist < carry_threshold:
                     one_two_idx.append([match.index[i], next_passes_df.index[j]])
 
+    return one_two_idx
 
-    # select the one-twos from the original pass dataframe
-    all_onetwos = match.loc[np.array(one_two_idx).reshape(1,-1)[0]]
 
-    if len(one_two_idx) == 0:
-        # return empty frame and notify if none found
-        print("No one-twos found.")
-        return pd.DataFrame([])
-    else:
-        # make extra location columns for easier plotting
-        all_onetwos[["x_start", "y_start"]] = pd.DataFrame(all_onetwos.location.tolist(), index=all_onetwos.index)
-        all_onetwos[["x_end", "y_end"]] = pd.DataFrame(all_onetwos.pass_end_location.tolist(), index=all_onetwos.index)
+def _find_one_twos_vectorised(match, sec_threshold, prog_threshold, carry_threshold, by_possession=False):
+    """
+    vectorised one-two search - finds the same pairs (in the same order) as _find_one_twos_loop
+    :param match: dataframe, passes with a time_in_secs column
+    :param sec_threshold: float, time threshold for defining one-two pass
+    :param prog_threshold: float, progression threshold for defining one-two pass
+    :param carry_threshold: float, carry threshold for defining one-two passes
+    :param by_possession: bool, if True only look for return passes in the same possession and period
+    :return: array, shape (n, 2) of [opening index, closing index] for each one-two
+    """
+    # every (pass, return pass) pair within the time window
+    open_pos, close_pos = _return_pass_candidates(match, sec_threshold, by_possession)
+
+    # distances used by the progression and carry thresholds
+    line_start, line_end, goal_start, goal_end, pass_dist = _one_two_distances(match, open_pos, close_pos)
+
+    # same conditions as the loop: progress towards the goal line or the goal, and player 2 doesn't carry too far
+    keep = (((line_end < line_start*prog_threshold) | (goal_end < goal_start*prog_threshold)) &
+            (pass_dist < carry_threshold))
 
-        return all_onetwos
+    return np.column_stack([match.index[open_pos[keep]], match.index[close_pos[keep]]])
+
+
+def _return_pass_candidates(match, sec_threshold, by_possession=False):
+    """
+    find every pair of passes (i, j) where j is played back from the recipient of i to the passer of i
+    within sec_threshold seconds of i (inclusive, same window as the original loop)
+    :param match: dataframe, passes with a time_in_secs column
+    :param sec_threshold: float, time threshold for defining one-two pass
+    :param by_possession: bool, if True i and j must also be in the same possession and period
+    :return: tuple, (opening positions, closing positions) as integer arrays, sorted by opening then closing pass
+    """
+    times = match["time_in_secs"].to_numpy(dtype=float)
+    if by_possession and len(match) > 0:
+        # one time line per (period, possession), laid end to end with gaps wider than the window, so no window
+        # reaches into another group (and stoppage time at the end of a half never meets the start of the next)
+        groups = match["period"].to_numpy(dtype=np.int64)*100_000 + match["possession"].to_numpy(dtype=np.int64)
+        group_codes, _ = pd.factorize(groups)
+        span = times.max() - times.min() + sec_threshold + 1
+        times = group_codes*span + (times - times.min())
+
+    # sort on time then find the window of each pass with a binary search
+    order = np.argsort(times, kind="stable")
+    sorted_times = times[order]
+    lo = np.searchsorted(sorted_times, times, side="left")
+    hi = np.searchsorted(sorted_times, times + sec_threshold, side="right")
+
+    # expand the windows into flat (i, j) pairs
+    counts = hi - lo
+    open_pos = np.repeat(np.arange(len(match)), counts)
+    window_offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    close_pos = order[np.repeat(lo, counts) + window_offset]
+
+    # compare players as integer codes (missing names get -1 and never match)
+    codes, _ = pd.factorize(pd.concat([match["player"], match["pass_recipient"]], ignore_index=True))
+    player_codes = codes[:len(match)]
+    recipient_codes = codes[len(match):]
+    is_return = ((player_codes[close_pos] == recipient_codes[open_pos]) &
+                 (recipient_codes[close_pos] == player_codes[open_pos]) &
+                 (player_codes[open_pos] >= 0) & (recipient_codes[open_pos] >= 0))
+    open_pos = open_pos[is_return]
+    close_pos = close_pos[is_return]
+
+    # keep the loop's ordering: by opening pass, then by closing pass in frame order
+    pair_order = np.lexsort((close_pos, open_pos))
+
+    return open_pos[pair_order], close_pos[pair_order]
+
+
+def _one_two_distances(match, open_pos, close_pos):
+    """
+    distances used to decide if a candidate pair is a one-two (see attached report)
+    :param match: dataframe, passes with location and pass_end_location columns
+    :param open_pos: array, positions of the opening passes
+    :param close_pos: array, positions of the closing passes
+    :return: tuple of arrays, (line_start, line_end, goal_start, goal_end, pass_dist)
+    """
+    start, end = _pass_xy(match)
+
+    # distance to goal line at the start of pass 1 and end of pass 2
+    line_start = 120 - start[open_pos, 0]
+    line_end = 120 - end[close_pos, 0]
+
+    # distance to the centre of the goal
+    goal_start = np.sqrt(np.power(start[open_pos, 0] - 120, 2) + np.power(start[open_pos, 1] - 40, 2))
+    goal_end = np.sqrt(np.power(end[close_pos, 0] - 120, 2) + np.power(end[close_pos, 1] - 40, 2))
+
+    # distance player 2 moves between receiving pass 1 and playing pass 2
+    pass_dist = np.sqrt(np.power(end[open_pos, 0] - start[close_pos, 0], 2) +
+                        np.power(end[open_pos, 1] - start[close_pos, 1], 2))
+
+    return line_start, line_end, goal_start, goal_end, pass_dist
+
+
+def _pass_xy(match):
+    """
+    start and end coordinates of each pass, from the location lists or the x/y columns of projected passes
+    :param match: dataframe, passes
+    :return: tuple, (start, end) float arrays of shape (n, 2)
+    """
+    if "location" in match.columns:
+        return _unpack_xy(match["location"]), _unpack_xy(match["pass_end_location"])
+
+    return (match[["x_start", "y_start"]].to_numpy(dtype=float),
+            match[["x_end", "y_end"]].to_numpy(dtype=float))
+
+
+def _unpack_xy(locations):
+    """
+    unpack a column of [x, y] lists into a float array, missing locations become nan
+    :param locations: series, StatsBomb location lists
+    :return: array, shape (n, 2)
+    """
+    # fast path - every row has a full location
+    try:
+        xy = np.array(locations.tolist(), dtype=float)
+        if xy.ndim == 2 and xy.shape[1] >= 2:
+            return xy[:, :2]
+    except (ValueError, TypeError):
+        pass
+
+    xy = np.full((len(locations), 2), np.nan)
+    for i, loc in enumerate(locations):
+        if isinstance(loc, (list, tuple, np.ndarray)) and len(loc) >= 2:
+            xy[i] = loc[:2]
+
+    return xy
 
 
 def get_team_info(count_data, agg_data):
@@ -259,13 +946,16 @@ def get_team_info(count_data, agg_data):
 
 
 # plotting functions
-def total_one_two_stack(one_twos, n):
+@profiling.timed("plot stack")
+def total_one_two_stack(one_twos, n, plot_dir="slide_plots", show=True):
     """
     Generate stacked bar plot showing top n players ranked by number of 1-2 passes
     TODO find a way to add team info that doesn't make it too crowded (maybe colour by team and then shade darker/lighter for open/close ??)
     :param one_twos: dataframe, with columns player, open_count, close_count, team, total_count, key_pc
     :param counts: dataframe, datafromae of one-two stats per player
     :param n: int, number of players to plot
+    :param plot_dir: str, folder to save the plot to
+    :param show: bool, if False the figure is only saved (no pyplot window or global figure state - see render_plots)
     :return:
     """
     # use surnames only
@@ -275,7 +965,7 @@ def total_one_two_stack(one_twos, n):
 
     one_twos["surname"] = surnames
 
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _new_figure(show, figsize=(12, 8))
 
     # # make color dict - only for coloring by team
     # unique = one_twos["team"].unique()
@@ -283,68 +973,72 @@ def total_one_two_stack(one_twos, n):
 
     one_twos.sort_values(by="total_count", ascending=False).head(n).set_index("surname")[
         ["open_count", "close_count"]].plot(kind="bar", stacked=True, color=["red", "green"], ax=ax)
-    plt.xticks(rotation=0)
+    ax.tick_params(axis="x", labelrotation=0)
     ax.set_ylabel("Count")
     ax.set_xlabel("Player")
-    plt.savefig(f"slide_plots/open_close_stack_top{n}.png")
-    plt.show()
+    _finish_figure(fig, _plot_path(plot_dir, f"open_close_stack_top{n}.png"), show)
 
 
-def key_pass_relplot(one_twos, n, name_labels=[]):
+@profiling.timed("plot relplot")
+def key_pass_relplot(one_twos, n, name_labels=[], plot_dir="slide_plots", show=True):
     """
     Generate seaborn relplot showing how many 1-2s a player opened vs closed, with
     size corresponding to percentage of 1-2s that are key passes (see attached report)
     :param one_twos: dataframe, with columns player, open_count, close_count, team, total_count, key_pc
     :param n: how many point to plot
     :param name_labels: which names to annotate on plot (surname only)
+    :param plot_dir: str, folder to save the plot to
+    :param show: bool, if False the figure is only saved (see total_one_two_stack)
     :return:
     """
     # plot opening against closing, scatter plot size = key pass percentage
-    sns.set(rc={"figure.figsize": (20, 15)})
+    with sns.axes_style("darkgrid"):
+        fig, ax = _new_figure(show, figsize=(20, 15))
 
-    p = sns.relplot(x="open_count", y="close_count", data=one_twos.head(2*n), hue="team", size="key_pc", sizes=(10, 500))
-    ax = p.axes[0, 0]
+    sns.scatterplot(x="open_count", y="close_count", data=one_twos.head(2*n), hue="team", size="key_pc",
+                    sizes=(10, 500), ax=ax)
     ax.set_xlabel("Opened")
     ax.set_ylabel("Closed")
 
     for idx, row in one_twos.head(n).iterrows():
-        x = row[1]
-        y = row[3]
+        x = row["open_count"]
+        y = row["close_count"]
         name = row["player"]
         if name in name_labels:
             ax.text(x - 0.25, y + 0.5, name.split(" ")[-1], horizontalalignment='right')
 
-    plt.savefig(f"slide_plots/open_closed_key_relplot_top{2*n}.png")
-    plt.show()
+    _finish_figure(fig, _plot_path(plot_dir, f"open_closed_key_relplot_top{2*n}.png"), show)
 
 
-def plot_match_one_twos(data, save_path="", save=True, grid=False):
+@profiling.timed("plot match")
+def plot_match_one_twos(data, save_path="", save=True, grid=False, plot_dir="slide_plots", show=True):
     """
     generate plot to display one-two passes on a pitch with 360 info to show other players if 360 freeze frame exists
     :param data: dataframe, one-two passes
     :param save_path: str, where to save the plot if not the default path
     :param save: bool, whether to save it
     :param grid: bool, True if you want to return a grid of all one-two passes in data, False if you only have one to display
+    :param plot_dir: str, folder to save the plot to
+    :param show: bool, if False the figure is only saved (see total_one_two_stack)
     :return:
     """
+    p = Pitch(line_color="white", pitch_color="green", pitch_type="statsbomb")
+
     if grid:
-        one_twos = np.array(data.index).reshape(-1, 2)
-        df = one_twos.reshape(-1, 2)
+        # opening and closing pass are consecutive rows - taken by position, as a pass in two one-twos repeats a label
+        n_pairs = len(data)//2
 
         # number of rows:
-        n_rows = int(np.ceil(len(df)/2))
+        n_rows = int(np.ceil(n_pairs/2))
         n_cols = 2
 
-        p = Pitch(line_color="white", pitch_color="green", pitch_type="statsbomb")
-
-        fig, axs = p.grid(ncols=n_cols, nrows=n_rows, grid_height=0.85, title_height=0.06, axis=False, endnote_height=0,
-                          title_space=0, endnote_space=0)
-
-        plt.figure(figsize=(12, 8))
+        fig, axs = _new_figure(show, figsize=(12, 4*n_rows), nrows=n_rows, ncols=n_cols, squeeze=False)
+        for ax in axs.flat:
+            p.draw(ax=ax)
 
         # for each one-two ...
-        for row, ax in zip(df, axs['pitch'].flat):
-            onetwodf = data.loc[row]
+        for k, ax in zip(range(n_pairs), axs.flat):
+            onetwodf = data.iloc[2*k:2*k + 2]
 
             i = 0
             p.arrows(xstart=onetwodf["x_start"].iloc[i], ystart=onetwodf["y_start"].iloc[i], xend=onetwodf["x_end"].iloc[i],
@@ -366,8 +1060,8 @@ def plot_match_one_twos(data, save_path="", save=True, grid=False):
                 pass
 
     else:
-        p = Pitch(line_color="white", pitch_color="green", pitch_type="statsbomb")
-        fig, ax = p.draw(figsize=(12, 8))
+        fig, ax = _new_figure(show, figsize=(12, 8))
+        p.draw(ax=ax)
 
         for i in range(len(data)):
 
@@ -391,33 +1085,48 @@ def plot_match_one_twos(data, save_path="", save=True, grid=False):
         except Exception:
             pass
 
-        if save:
-            plt.savefig(f"slide_plots/{save_path}match_one_two_360.png")
-            plt.show()
-
+    path = _plot_path(plot_dir, f"{save_path}match_one_two_360.png") if save else None
+    _finish_figure(fig, path, show and save)
 
 
-def plot_one_two_heatmaps(data, competition, season, team, combined=True):
+@profiling.timed("plot heatmaps")
+def plot_one_two_heatmaps(data, competition, season, team, combined=True, plot_dir="slide_plots", show=True,
+                          method="kde", bins=BINS, sigma=1.0, grids=None):
     """
     plot heatmap for location of opening and closing passes on a 1x2 grid
-    :param data: dataframe, one-two passes to plot
+    :param data: dataframe or OneTwoPairs, one-two passes to plot
     :param competition: int/str, some identifier (i.e. name or id) for the competition (used for save path)
     :param season: int/str, some identifier for the season
     :param team: str, team name (could also be used for player name)
     :param combined: bool, indicates if the data is aggregated over all teams/players
+    :param plot_dir: str, folder to save the plot to
+    :param show: bool, if False the figure is only saved (see total_one_two_stack)
+    :param method: str, "kde" (seaborn kde, slow for a whole season) or "hist" (binned counts - see one_two.heatmaps)
+    :param bins: tuple, number of bins along the length and width of the pitch for "hist"
+    :param sigma: float, gaussian smoothing (in bins) for "hist" - None for none
+    :param grids: tuple, optional precomputed (opening, closing) grids for "hist" (e.g. from one_two.heatmaps.load_grids,
+    or the difference between two players' grids) - data is then ignored
     :return:
     """
+    if method == "hist":
+        _plot_grid_heatmaps(data, competition, season, team, combined, plot_dir, show, bins, sigma, grids)
+        return
+    elif method != "kde":
+        raise ValueError(f"unknown heatmap method: {method}")
 
     # split into opening and closing passes
-    open_12 = data.loc[data.index[::2]]
-    close_12 = data.loc[data.index[1::2]]
+    if isinstance(data, OneTwoPairs):
+        open_12 = data.opening
+        close_12 = data.closing
+    else:
+        open_12 = data.iloc[::2]
+        close_12 = data.iloc[1::2]
 
-    p = Pitch(line_color="white", pitch_color="green", pitch_type="statsbomb")
     p = Pitch(line_color="black", pitch_color="white", pitch_type="statsbomb")
 
-    fig, axs = p.grid(ncols=2, nrows=1,grid_height=0.9, title_height=0.06, axis=False, endnote_height=0, title_space=0, endnote_space=0)
-    # plt.figure(figsize=(12, 8))
-    for i, ax in zip(np.arange(2), axs['pitch'].flat):
+    fig, axs = _new_figure(show, figsize=(16, 6), nrows=1, ncols=2)
+    for i, ax in zip(np.arange(2), axs.flat):
+        p.draw(ax=ax)
         if i==0:
             df = open_12
             ax.set_title("Opening Pass", fontsize=30)
@@ -450,8 +1159,131 @@ def plot_one_two_heatmaps(data, competition, season, team, combined=True):
             )
 
     if combined:
-        plt.savefig(f"slide_plots/{competition}_{season}_heatmap.png")
+        path = _plot_path(plot_dir, f"{competition}_{season}_heatmap.png")
+    else:
+        path = _plot_path(plot_dir, f"{competition}_{season}_{team}_heatmap.png")
+
+    _finish_figure(fig, path, show)
+
+
+def _plot_grid_heatmaps(data, competition, season, team, combined, plot_dir, show, bins, sigma, grids):
+    """
+    binned version of plot_one_two_heatmaps
+    """
+    if grids is None:
+        grids = one_two_grids(data, bins=bins, sigma=sigma)
+    x_edges, y_edges = bin_edges(grids[0].shape)
+
+    p = Pitch(line_color="black", pitch_color="white", pitch_type="statsbomb", line_zorder=2)
+
+    fig, axs = _new_figure(show, figsize=(16, 6), nrows=1, ncols=2)
+    for ax, grid, title in zip(axs.flat, grids, ["Opening Pass", "Closing Pass"]):
+        p.draw(ax=ax)
+        ax.set_title(title, fontsize=30)
+        # differences between two players' grids go negative, so centre the colours on 0 for those
+        if grid.min() < 0:
+            limit = np.abs(grid).max()
+            mesh = ax.pcolormesh(x_edges, y_edges, grid.T, cmap="coolwarm", vmin=-limit, vmax=limit, alpha=.8)
+        else:
+            mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(grid.T, 0), cmap="viridis", alpha=.8)
+        fig.colorbar(mesh, ax=ax, shrink=0.5)
+
+    if combined:
+        path = _plot_path(plot_dir, f"{competition}_{season}_heatmap.png")
     else:
-        plt.savefig(f"slide_plots/{competition}_{season}_{team}_heatmap.png")
+        path = _plot_path(plot_dir, f"{competition}_{season}_{team}_heatmap.png")
+
+    _finish_figure(fig, path, show)
+
+
+def render_plots(plot_jobs, workers=1):
+    """
+    draw and save many plots (e.g. a heatmap per player) without showing them, on a process pool if workers > 1
+    each plot gets its own Figure that is closed once saved, so nothing builds up in pyplot
+    :param plot_jobs: list, of (plotting function, dict of its arguments) pairs - the functions must take show
+    :param workers: int, number of processes (1 draws them here one after another)
+    :return: None
+    """
+    if workers > 1 and len(plot_jobs) > 1:
+        if _pool_map(_render_plot, plot_jobs, workers) is not None:
+            return
+
+    for job in plot_jobs:
+        _render_plot(job)
+
+
+def _render_plot(job):
+    """
+    worker for render_plots
+    """
+    func, kwargs = job
+    func(**kwargs, show=False)
+
+
+def _pool_map(func, jobs, workers, chunksize=1):
+    """
+    run func on every job in a process pool, keeping the results in job order
+    an error raised by func itself is raised again here (not retried), but if the pool can't be used at all - it can't
+    start, the jobs can't be pickled or a worker process dies - None is returned so the caller can run the jobs itself
+    :param func: function, module level function taking one job
+    :param jobs: list, of jobs
+    :param workers: int, number of processes (None for one per core)
+    :param chunksize: int, number of jobs sent to a worker at a time
+    :return: list, of results (or None)
+    """
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_pool_task, [(func, job) for job in jobs], chunksize=chunksize))
+    except (BrokenProcessPool, OSError, NotImplementedError, pickle.PicklingError, AttributeError, TypeError) as err:
+        # (task errors come back as results, so only the pool itself gets here - unpicklable jobs raise
+        # PicklingError, AttributeError or TypeError)
+        print(f"process pool unavailable ({err}), running one at a time")
+        return None
+
+    for failed, result in results:
+        if failed:
+            raise result
+    return [result for _, result in results]
 
-    plt.show()
\ No newline at end of file
+
+def _pool_task(task):
+    """
+    process pool worker for _pool_map - returns (whether func raised, its result or the error)
+    """
+    func, job = task
+    try:
+        return False, func(job)
+    except Exception as err:
+        return True, err
+
+
+def _new_figure(show, figsize, nrows=1, ncols=1, **kwargs):
+    """
+    make a figure and its axes - through pyplot if it's going to be shown, otherwise a plain Figure that pyplot
+    doesn't know about (so it can't be left open, and works on any backend including Agg in worker processes)
+    :return: tuple, (figure, axes)
+    """
+    if show:
+        return plt.subplots(nrows, ncols, figsize=figsize, **kwargs)
+
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots(nrows, ncols, **kwargs)
+
+
+def _finish_figure(fig, path, show):
+    """
+    save a figure (if path isn't None), show it if asked and then close it
+    """
+    if path is not None:
+        fig.savefig(path)
+    if show:
+        plt.show()
+        plt.close(fig)
+
+
+def _plot_path(plot_dir, file_name):
+    """
+    :return: str, path to save a plot to (making plot_dir if it doesn't exist yet)
+    """
+    os.makedirs(plot_dir, exist_ok=True)
+    return os.path.join(plot_dir, file_name)
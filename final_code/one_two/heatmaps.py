@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from one_two.pairs import OneTwoPairs
+
+# StatsBomb pitch size and the default number of bins along each side (5 yard squares)
+PITCH_LENGTH = 120
+PITCH_WIDTH = 80
+BINS = (24, 16)
+
+
+def bin_edges(bins=BINS):
+    """
+    :param bins: tuple, number of bins along the length and width of the pitch
+    :return: tuple, (x edges, y edges)
+    """
+    return np.linspace(0, PITCH_LENGTH, bins[0] + 1), np.linspace(0, PITCH_WIDTH, bins[1] + 1)
+
+
+def pass_grid(x, y, bins=BINS, sigma=None, normalise=True):
+    """
+    count passes in each bin of the pitch
+    :param x: array, x coordinates
+    :param y: array, y coordinates
+    :param bins: tuple, number of bins along the length and width of the pitch
+    :param sigma: float, optional width (in bins) of a gaussian to smooth the grid with
+    :param normalise: bool, if True divide by the number of passes so grids of different players can be compared
+    :return: array, shape bins - grid[i, j] is the bin i along the length and j across the width
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x_edges, y_edges = bin_edges(bins)
+    grid, _, _ = np.histogram2d(x[keep], y[keep], bins=[x_edges, y_edges])
+
+    return _finish_grid(grid, sigma, normalise)
+
+
+def one_two_grids(data, bins=BINS, sigma=None, normalise=True):
+    """
+    grids of where one-twos were opened (start of the opening pass) and closed (end of the closing pass) - the same
+    positions as the kde heatmaps of plot_one_two_heatmaps
+    :param data: OneTwoPairs or dataframe of one-twos (opening and closing pass in consecutive rows)
+    :param bins: tuple, number of bins along the length and width of the pitch
+    :param sigma: float, optional gaussian smoothing (in bins)
+    :param normalise: bool, if True each grid sums to 1
+    :return: tuple, (opening grid, closing grid)
+    """
+    pairs = OneTwoPairs.coerce(data)
+
+    return (pass_grid(pairs.data["open_x_start"], pairs.data["open_y_start"], bins, sigma, normalise),
+            pass_grid(pairs.data["close_x_end"], pairs.data["close_y_end"], bins, sigma, normalise))
+
+
+def grouped_grids(data, by="player", bins=BINS, sigma=None, normalise=True):
+    """
+    opening and closing grids for every player (or team) at once - each player's grids cover the one-twos they opened
+    or closed, as for plot_one_two_heatmaps(data.for_player(player))
+    :param data: OneTwoPairs or dataframe of one-twos
+    :param by: str, "player" or "team"
+    :param bins: tuple, number of bins along the length and width of the pitch
+    :param sigma: float, optional gaussian smoothing (in bins)
+    :param normalise: bool, if True each grid sums to 1
+    :return: dict, {player or team: (opening grid, closing grid)}
+    """
+    pair_data = OneTwoPairs.coerce(data).data
+
+    # which group(s) each one-two counts towards - both players, or the team once
+    if by == "player":
+        codes, names = pd.factorize(np.concatenate([pair_data["opener"].to_numpy(dtype=object),
+                                                    pair_data["closer"].to_numpy(dtype=object)]))
+        rows = np.tile(np.arange(len(pair_data)), 2)
+    elif by == "team":
+        codes, names = pd.factorize(pair_data["team"].to_numpy(dtype=object))
+        rows = np.arange(len(pair_data))
+    else:
+        raise ValueError(f"unknown grouping: {by}")
+
+    grids = []
+    for x_col, y_col in [("open_x_start", "open_y_start"), ("close_x_end", "close_y_end")]:
+        cells = _bin_index(pair_data[x_col].to_numpy(dtype=float)[rows], pair_data[y_col].to_numpy(dtype=float)[rows],
+                           bins)
+        keep = (cells >= 0) & (codes >= 0)
+        counts = np.bincount(codes[keep]*bins[0]*bins[1] + cells[keep], minlength=len(names)*bins[0]*bins[1])
+        grids.append(counts.reshape(len(names), bins[0], bins[1]).astype(float))
+
+    return {name: (_finish_grid(grids[0][k], sigma, normalise), _finish_grid(grids[1][k], sigma, normalise))
+            for k, name in enumerate(names)}
+
+
+def save_grids(path, grids):
+    """
+    save grids from grouped_grids (e.g. every player of a season) so the heatmaps can be redrawn without the passes
+    :param path: str, .npz file to save to
+    :param grids: dict, {name: (opening grid, closing grid)}
+    """
+    names = list(grids.keys())
+    np.savez_compressed(path, names=np.array(names, dtype=str),
+                        opening=np.stack([grids[name][0] for name in names]),
+                        closing=np.stack([grids[name][1] for name in names]))
+
+
+def load_grids(path):
+    """
+    :param path: str, .npz file written by save_grids
+    :return: dict, {name: (opening grid, closing grid)}
+    """
+    with np.load(path) as saved:
+        return {name: (saved["opening"][k], saved["closing"][k]) for k, name in enumerate(saved["names"].tolist())}
+
+
+def _bin_index(x, y, bins):
+    """
+    :return: array, flat bin of each point (-1 if it's missing or off the pitch)
+    """
+    i = np.floor(x/PITCH_LENGTH*bins[0])
+    j = np.floor(y/PITCH_WIDTH*bins[1])
+    # points on the far touchline/goal line go in the last bin, like histogram2d
+    i = np.where(x == PITCH_LENGTH, bins[0] - 1, i)
+    j = np.where(y == PITCH_WIDTH, bins[1] - 1, j)
+    ok = (i >= 0) & (i < bins[0]) & (j >= 0) & (j < bins[1])
+
+    return np.where(ok, np.nan_to_num(i)*bins[1] + np.nan_to_num(j), -1).astype(np.int64)
+
+
+def _finish_grid(grid, sigma, normalise):
+    if sigma:
+        grid = _smooth(grid, sigma)
+    if normalise and grid.sum() > 0:
+        grid = grid/grid.sum()
+    return grid
+
+
+def _smooth(grid, sigma):
+    """
+    gaussian smoothing, one axis at a time (edges are treated as empty)
+    """
+    # (np.convolve's "same" mode needs the kernel to be no longer than the grid)
+    radius = min(max(int(np.ceil(3*sigma)), 1), (min(grid.shape) - 1)//2)
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5*(offsets/sigma)**2)
+    kernel /= kernel.sum()
+
+    grid = np.apply_along_axis(np.convolve, 0, grid, kernel, mode="same")
+    return np.apply_along_axis(np.convolve, 1, grid, kernel, mode="same")
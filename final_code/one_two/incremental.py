@@ -0,0 +1,146 @@
+import json
+import os
+import pandas as pd
+from one_two.cache import encode_passes, decode_passes, match_version
+from one_two.functions import get_matches, get_one_twos, collect_one_twos, project_passes, _get_match_passes, \
+    _player_count_parts, _finish_player_counts
+
+# bump this whenever what is saved per match changes - a store from another version is rebuilt from scratch
+STORE_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+
+
+def update_season_one_twos(comp, season, path, s, p, c, store_dir, cache=None, columns=None, open_data_path=None,
+                           by_possession=False):
+    """
+    bring a saved season of one-twos up to date - only matches that are new, or that StatsBomb has updated since the
+    last run, are loaded and searched; everything else (including their player counts) is read back from store_dir
+    the store is rebuilt if it was made with different thresholds
+    :param comp: int, competition id
+    :param season: int, season id
+    :param path: str, path to retrieve 360 data
+    :param s: float, time threshold for defining one-two pass
+    :param p: float, progression threshold for defining one-two pass
+    :param c: float, carry threshold for defining one-two passes
+    :param store_dir: str, folder holding the manifest and per-match results for this season
+    :param cache: PassCache, optional on-disk cache of the pass data (see one_two.cache)
+    :param columns: list, optional columns to keep (e.g. PASS_COLUMNS) - see project_passes
+    :param open_data_path: str, optional path to a local open-data clone (see get_pass_data)
+    :param by_possession: bool, if True only pair passes from the same possession and period (see get_one_twos)
+    :return: tuple, (one-two passes for season, player counts as from get_player_counts, list of updated match ids)
+    """
+    params = {"competition_id": comp, "season_id": season, "threshold_seconds": s, "threshold_progression": p,
+              "threshold_carry": c, "columns": columns}
+    # (only recorded when switched on, so existing stores aren't rebuilt)
+    if by_possession:
+        params["by_possession"] = True
+
+    # start again if the thresholds (or the store layout) have changed
+    manifest = load_manifest(store_dir)
+    if manifest["version"] != STORE_VERSION or manifest["params"] != params:
+        manifest = {"version": STORE_VERSION, "params": params, "matches": {}}
+
+    # always check the current match list rather than the cached one, then refresh the cache with it
+    matches_df = get_matches(comp, season, open_data_path=open_data_path)
+    if cache is not None:
+        cache.put_matches(comp, season, matches_df)
+
+    # a match needs (re)processing if we haven't seen it or its data has been updated
+    current = {str(match_id): match_version(row) for match_id, row in zip(matches_df["match_id"],
+                                                                          matches_df.to_dict("records"))}
+    changed = [match_id for match_id, version in current.items()
+               if manifest["matches"].get(match_id, {}).get("version") != version]
+
+    for match_id in changed:
+        # cached passes for an updated match are out of date
+        if cache is not None and match_id in manifest["matches"]:
+            cache.invalidate(comp, season, match_id)
+
+        passes_df, _ = _get_match_passes(comp, season, match_id, path, cache, open_data_path)
+        if columns is not None:
+            passes_df = project_passes(passes_df, columns)
+        one_twos = get_one_twos(passes_df, sec_threshold=s, prog_threshold=p, carry_threshold=c,
+                                by_possession=by_possession)
+
+        _save_match(store_dir, match_id, one_twos)
+        manifest["matches"][match_id] = {"version": current[match_id], "n_one_twos": len(one_twos)//2}
+
+    # forget matches that are no longer in the list
+    for match_id in set(manifest["matches"]) - set(current):
+        _remove_match(store_dir, match_id)
+        del manifest["matches"][match_id]
+
+    save_manifest(store_dir, manifest)
+
+    # put the season back together from the saved matches, in match list order
+    match_ids = [match_id for match_id in current if manifest["matches"][match_id]["n_one_twos"] > 0]
+    one_two_agg = collect_one_twos((match_id, _load_match(store_dir, match_id)) for match_id in match_ids)
+    parts = [pd.read_parquet(_match_path(store_dir, "counts", match_id)) for match_id in match_ids]
+    if len(parts) > 0:
+        player_counts = _finish_player_counts(pd.concat(parts, ignore_index=True))
+    else:
+        player_counts = _finish_player_counts(_player_count_parts(pd.DataFrame([])))
+
+    return one_two_agg, player_counts, changed
+
+
+def load_manifest(store_dir):
+    """
+    :param store_dir: str, folder holding the manifest
+    :return: dict, the manifest (an empty one if the store doesn't exist yet)
+    """
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {"version": None, "params": None, "matches": {}}
+
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(store_dir, manifest):
+    """
+    write the manifest (via a temporary file so an interrupted run doesn't leave it half written)
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+
+def _match_path(store_dir, kind, match_id):
+    return os.path.join(store_dir, kind, f"{match_id}.parquet")
+
+
+def _save_match(store_dir, match_id, one_twos):
+    """
+    save a match's one-twos (with any freeze frames in a side table) and its player count rows
+    """
+    _remove_match(store_dir, match_id)
+    if len(one_twos) == 0:
+        return
+
+    for kind in ["one_twos", "counts"]:
+        os.makedirs(os.path.join(store_dir, kind), exist_ok=True)
+
+    flat_df, freeze_frames = encode_passes(one_twos)
+    flat_df.to_parquet(_match_path(store_dir, "one_twos", match_id))
+    if freeze_frames is not None:
+        freeze_frames.to_parquet(_match_path(store_dir, "one_twos", f"{match_id}_360"))
+    _player_count_parts(one_twos).to_parquet(_match_path(store_dir, "counts", match_id))
+
+
+def _load_match(store_dir, match_id):
+    flat_df = pd.read_parquet(_match_path(store_dir, "one_twos", match_id))
+    ff_path = _match_path(store_dir, "one_twos", f"{match_id}_360")
+    freeze_frames = pd.read_parquet(ff_path) if os.path.exists(ff_path) else None
+
+    return decode_passes(flat_df, freeze_frames)
+
+
+def _remove_match(store_dir, match_id):
+    for path in [_match_path(store_dir, "one_twos", match_id), _match_path(store_dir, "one_twos", f"{match_id}_360"),
+                 _match_path(store_dir, "counts", match_id)]:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,133 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# orjson parses the big event files a lot faster, but plain json works too
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def read_json(path):
+    """
+    :param path: str, path to a json file
+    :return: parsed json
+    """
+    with open(path, "rb") as f:
+        if orjson is not None:
+            return orjson.loads(f.read())
+        return json.load(f)
+
+
+def load_matches(root, competition_ID, season_ID):
+    """
+    local version of sb.matches - read a season's matches from a clone of the StatsBomb open-data repository
+    :param root: str, path to the data folder of the open-data clone (the one holding matches/, events/, three-sixty/)
+    :param competition_ID: int, id number of competition
+    :param season_ID: int, id number of season
+    :return: dataframe, one row per match, with team names in home_team/away_team as in sb.matches
+    """
+    matches = read_json(os.path.join(root, "matches", str(competition_ID), f"{season_ID}.json"))
+
+    rows = []
+    for match in matches:
+        row = {}
+        for key, value in match.items():
+            if not isinstance(value, dict):
+                row[key] = value
+            elif f"{key}_name" in value:
+                # home_team/away_team hold {home_team_id, home_team_name, ...}
+                row[key] = value[f"{key}_name"]
+                row[f"{key}_id"] = value.get(f"{key}_id")
+            elif "name" in value:
+                row[key] = value["name"]
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def load_events(root, match_id):
+    """
+    local version of sb.events - read a match's events with nested fields flattened the same way
+    (e.g. pass.recipient.name -> pass_recipient, pass.end_location -> pass_end_location)
+    :param root: str, path to the data folder of the open-data clone
+    :param match_id: int, id number of match
+    :return: dataframe, one row per event
+    """
+    events = read_json(os.path.join(root, "events", f"{match_id}.json"))
+
+    events_df = pd.DataFrame([_flatten_event(event) for event in events])
+    events_df["match_id"] = match_id
+
+    return events_df
+
+
+def load_three_sixty(root, match_id):
+    """
+    read a match's 360 freeze frames
+    :param root: str, path to the data folder of the open-data clone
+    :param match_id: int, id number of match
+    :return: dict, {event id: {event_uuid, visible_area, freeze_frame}} - or None if the match has no 360 data
+    """
+    path = os.path.join(root, "three-sixty", f"{match_id}.json")
+    if not os.path.exists(path):
+        return None
+
+    return three_sixty_lookup(path)
+
+
+def three_sixty_lookup(path):
+    """
+    read a 360 file into a lookup by event id (so passes can be matched to their frame without a merge)
+    :param path: str, path to the 360 json file of a match
+    :return: dict, {event id: {event_uuid, visible_area, freeze_frame}}
+    """
+    return {record["event_uuid"]: record for record in read_json(path)}
+
+
+def _flatten_event(event):
+    """
+    flatten one StatsBomb event - {id, name} dicts become the name (plus a _id column), event type details like
+    "pass": {...} become pass_ columns
+    :param event: dict, raw event
+    :return: dict, flat event
+    """
+    flat = {}
+    for key, value in event.items():
+        if isinstance(value, dict) and "name" in value:
+            flat[key] = value["name"]
+            flat[f"{key}_id"] = value.get("id")
+        elif isinstance(value, dict) and key != "tactics":
+            for sub_key, sub_value in value.items():
+                col = f"{key}_{sub_key}"
+                if isinstance(sub_value, dict) and "name" in sub_value:
+                    flat[col] = sub_value["name"]
+                    flat[f"{col}_id"] = sub_value.get("id")
+                else:
+                    flat[col] = sub_value
+        else:
+            flat[key] = value
+
+    return flat
+
+
+def iter_threaded(func, items, workers=8):
+    """
+    map func over items with a thread pool, yielding results in order while only keeping a few in flight
+    (so reading files overlaps without loading a whole season at once)
+    :param func: function, called with each item
+    :param items: iterable, of arguments
+    :param workers: int, number of threads (and results read ahead)
+    :return: generator, of func(item) for each item in order
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
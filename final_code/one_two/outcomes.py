@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from one_two.pairs import OneTwoPairs
+from one_two import profiling
+
+# columns of the outcome events kept for each match (see outcome_events)
+OUTCOME_EVENT_COLUMNS = ["match_id", "possession", "time_in_secs", "team", "shot", "xg", "goal", "turnover"]
+
+# per one-two outcome features (see attribute_outcomes)
+OUTCOME_COLUMNS = ["shot", "n_shots", "xg", "goal", "turnover", "seconds_to_shot"]
+
+
+def outcome_events(events):
+    """
+    cut a match's full event data down to what can happen after a one-two - every shot (with its xG and whether it was
+    a goal) and every possession lost to the other team - small enough to cache alongside the passes
+    a possession counts as a turnover if the next possession in the same period belongs to the other team and it didn't
+    end in a shot, timed at the first event of that next possession
+    :param events: dataframe, every event of a match (as from sb.events or open_data.load_events)
+    :return: dataframe, one row per outcome event with the OUTCOME_EVENT_COLUMNS, in possession then time order
+    """
+    time_in_secs = events["minute"].to_numpy()*60 + events["second"].to_numpy()
+    match_id = events["match_id"].to_numpy(dtype="int64") if "match_id" in events.columns else \
+        np.full(len(events), -1, dtype="int64")
+
+    # shots
+    is_shot = (events["type"] == "Shot").to_numpy()
+    xg = events["shot_statsbomb_xg"].to_numpy(dtype=float) if "shot_statsbomb_xg" in events.columns else \
+        np.zeros(len(events))
+    goal = (events["shot_outcome"] == "Goal").to_numpy() if "shot_outcome" in events.columns else \
+        np.zeros(len(events), dtype=bool)
+    shots = pd.DataFrame({
+        "match_id": match_id[is_shot],
+        "possession": events["possession"].to_numpy()[is_shot],
+        "time_in_secs": time_in_secs[is_shot],
+        "team": events["team"].to_numpy(dtype=object)[is_shot],
+        "shot": True,
+        "xg": np.nan_to_num(xg[is_shot]),
+        "goal": goal[is_shot],
+        "turnover": False,
+    })
+
+    # turnovers - first event of each possession, compared with the possession before it
+    first = events.sort_values(["period", "possession"], kind="stable").drop_duplicates("possession")
+    previous = first.shift(1)
+    lost = (first["period"].to_numpy() == previous["period"].to_numpy()) & \
+           (first["possession_team"].to_numpy(dtype=object) != previous["possession_team"].to_numpy(dtype=object)) & \
+           ~np.isin(previous["possession"].to_numpy(), events["possession"].to_numpy()[is_shot])
+    first_time = first["minute"].to_numpy()*60 + first["second"].to_numpy()
+    turnovers = pd.DataFrame({
+        "match_id": match_id[0] if len(match_id) > 0 else -1,
+        "possession": previous["possession"].to_numpy()[lost],
+        "time_in_secs": first_time[lost],
+        "team": previous["possession_team"].to_numpy(dtype=object)[lost],
+        "shot": False,
+        "xg": 0.0,
+        "goal": False,
+        "turnover": True,
+    })
+
+    outcomes = pd.concat([shots, turnovers], ignore_index=True)
+    outcomes = outcomes.astype({"match_id": "int64", "possession": "int32", "time_in_secs": "float32",
+                                "xg": "float32", "shot": bool, "goal": bool, "turnover": bool})
+
+    return outcomes.sort_values(["possession", "time_in_secs"], kind="stable").reset_index(drop=True)
+
+
+def attribute_outcomes(one_twos, outcomes, window=15):
+    """
+    what the rest of the possession brought after each one-two - the shots, xG, goals and turnovers of the same possession
+    from the closing pass up to window seconds later, joined for all the one-twos at once (a grouped searchsorted on
+    match and possession)
+    :param one_twos: OneTwoPairs, or dataframe of one-twos (opening and closing pass in consecutive rows) with match_id,
+    possession and time_in_secs
+    :param outcomes: dataframe, outcome_events of the matches (concatenated), or dict {match_id: dataframe} as from
+    iter_match_outcomes
+    :param window: float, seconds after the closing pass to look (None for the whole rest of the possession)
+    :return: dataframe, one row per one-two (same order as the pairs) with the OUTCOME_COLUMNS
+        shot/goal/turnover - whether there was one, n_shots and xg - number of shots and their total xG,
+        seconds_to_shot - from the closing pass to the first shot (nan if there wasn't one)
+    """
+    data = OneTwoPairs.coerce(one_twos).data
+    if isinstance(outcomes, dict):
+        outcomes = pd.concat(list(outcomes.values()), ignore_index=True)
+
+    with profiling.stage("attribute outcomes", rows=len(data)):
+        # one code per (match, possession) shared by both sides of the join
+        pair_keys = _possession_key(data["match_id"].to_numpy(), data["close_possession"].to_numpy())
+        event_keys = _possession_key(outcomes["match_id"].to_numpy(), outcomes["possession"].to_numpy())
+        codes, _ = pd.factorize(np.concatenate([event_keys, pair_keys]))
+        event_codes, pair_codes = codes[:len(event_keys)], codes[len(event_keys):]
+
+        # sort the events by possession then time, as one number per event so a single searchsorted finds each window
+        event_time = outcomes["time_in_secs"].to_numpy(dtype=float)
+        pair_time = data["close_time_in_secs"].to_numpy(dtype=float)
+        span = max(event_time.max(initial=0), pair_time.max(initial=0)) + (window or 0) + 1
+        position = event_codes*span + event_time
+        order = np.argsort(position, kind="stable")
+        position = position[order]
+        start = pair_codes*span + pair_time
+        lo = np.searchsorted(position, start, side="left")
+        hi = np.searchsorted(position, (pair_codes + 1)*span if window is None else start + window, side="right")
+
+        # window totals from running totals
+        shot = outcomes["shot"].to_numpy()[order]
+        totals = {}
+        for col, values in [("n_shots", shot), ("xg", outcomes["xg"].to_numpy(dtype=float)[order]),
+                            ("goal", outcomes["goal"].to_numpy()[order]),
+                            ("turnover", outcomes["turnover"].to_numpy()[order])]:
+            running = np.r_[0, np.cumsum(values)]
+            totals[col] = running[hi] - running[lo]
+
+        # first shot in each window
+        shot_pos = np.flatnonzero(shot)
+        first = np.searchsorted(shot_pos, lo)
+        found = first < len(shot_pos)
+        found[found] = shot_pos[first[found]] < hi[found]
+        seconds_to_shot = np.full(len(data), np.nan)
+        seconds_to_shot[found] = event_time[order][shot_pos[first[found]]] - pair_time[found]
+
+    return pd.DataFrame({
+        "shot": totals["n_shots"] > 0,
+        "n_shots": totals["n_shots"].astype(np.int64),
+        "xg": totals["xg"],
+        "goal": totals["goal"] > 0,
+        "turnover": totals["turnover"] > 0,
+        "seconds_to_shot": seconds_to_shot,
+    }, index=data.index)[OUTCOME_COLUMNS]
+
+
+def _possession_key(match_ids, possessions):
+    """
+    :return: array, one int64 per (match, possession) - possessions are numbered from 1 within each match
+    """
+    return np.asarray(match_ids, dtype=np.int64)*100_000 + np.asarray(possessions, dtype=np.int64)
+
+
+def player_outcomes(one_twos, attribution):
+    """
+    how often each player's one-twos led to a shot, a goal or a turnover - merge with get_player_counts on player to add
+    them to the leaderboard
+    :param one_twos: OneTwoPairs, or dataframe of one-twos, the outcomes were attributed to
+    :param attribution: dataframe, output of attribute_outcomes
+    :return: dataframe, one row per player - one-twos they opened or closed, shot_pc, goal_pc, turnover_pc, total xg and
+    xg per one-two
+    """
+    per_player = OneTwoPairs.coerce(one_twos).per_player(attribution)
+    summary = per_player.groupby("player", sort=True).agg(one_twos=("shot", "size"), shot_pc=("shot", "mean"),
+                                                          goal_pc=("goal", "mean"), turnover_pc=("turnover", "mean"),
+                                                          xg=("xg", "sum"), xg_per_one_two=("xg", "mean"))
+    summary[["shot_pc", "goal_pc", "turnover_pc"]] *= 100
+
+    return summary.reset_index()
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+# pass columns kept for each side of the one-two, as float32
+COORDINATES = ["x_start", "y_start", "x_end", "y_end"]
+
+# stands in for the column-less frame get_one_twos/collect_one_twos return when there are no one-twos, so the empty
+# pairs still have every column
+EMPTY_ONE_TWOS = pd.DataFrame({"match_id": pd.Series(dtype="int64"), "id": pd.Series(dtype=object),
+                               "period": pd.Series(dtype="int8"), "possession": pd.Series(dtype="int32"),
+                               "time_in_secs": pd.Series(dtype="float32"), "player": pd.Series(dtype=object),
+                               "pass_recipient": pd.Series(dtype=object), "possession_team": pd.Series(dtype=object),
+                               **{col: pd.Series(dtype="float32") for col in COORDINATES},
+                               "pass_shot_assist": pd.Series(dtype=bool), "pass_goal_assist": pd.Series(dtype=bool)})
+
+
+class OneTwoPairs:
+    """
+    compact one row per one-two version of the frame returned by get_one_twos (where the opening and closing passes
+    are consecutive rows carrying every StatsBomb column)
+    opening/closing passes are separate columns, so nothing depends on row parity, players and teams are categoricals,
+    coordinates are float32 and the full events can be looked up again through open_id/close_id
+    """
+
+    def __init__(self, data):
+        """
+        :param data: dataframe, one row per one-two (see from_one_twos for the columns)
+        """
+        self.data = data
+
+    @classmethod
+    def from_one_twos(cls, one_twos):
+        """
+        build from the interleaved opening/closing rows of get_one_twos (or collect_one_twos)
+        :param one_twos: dataframe, one-two passes with the opening and closing pass in consecutive rows
+        :return: OneTwoPairs
+        """
+        if len(one_twos) == 0:
+            one_twos = EMPTY_ONE_TWOS
+        n_pairs = len(one_twos)//2
+        open_rows = one_twos.iloc[0:2*n_pairs:2]
+        close_rows = one_twos.iloc[1:2*n_pairs:2]
+
+        # match id from the column, or from the (match, event_index) index of collect_one_twos
+        if "match_id" in one_twos.columns:
+            match_ids = open_rows["match_id"].to_numpy(dtype="int64")
+        elif "match" in one_twos.index.names:
+            match_ids = open_rows.index.get_level_values("match").to_numpy().astype("int64")
+        else:
+            match_ids = np.full(n_pairs, -1, dtype="int64")
+        event_index = (open_rows.index.get_level_values(-1), close_rows.index.get_level_values(-1))
+
+        # opener and closer share one set of player codes
+        players = pd.unique(np.concatenate([open_rows["player"].to_numpy(dtype=object),
+                                            close_rows["player"].to_numpy(dtype=object)]))
+        data = pd.DataFrame({
+            "match_id": match_ids,
+            "open_index": np.asarray(event_index[0]),
+            "close_index": np.asarray(event_index[1]),
+            "opener": pd.Categorical(open_rows["player"].to_numpy(dtype=object), categories=players),
+            "closer": pd.Categorical(close_rows["player"].to_numpy(dtype=object), categories=players),
+            "team": pd.Categorical(open_rows["possession_team"].to_numpy(dtype=object)),
+        })
+        for col in ["id", "period", "possession", "time_in_secs"]:
+            if col in one_twos.columns:
+                data[f"open_{col}"] = open_rows[col].to_numpy()
+                data[f"close_{col}"] = close_rows[col].to_numpy()
+
+        # coordinates of both passes
+        for side, rows in [("open", open_rows), ("close", close_rows)]:
+            coords = _pass_coordinates(rows)
+            for k, col in enumerate(COORDINATES):
+                data[f"{side}_{col}"] = coords[:, k]
+            for flag in ["shot_assist", "goal_assist"]:
+                col = f"pass_{flag}"
+                data[f"{side}_{flag}"] = rows[col].eq(True).to_numpy() if col in rows.columns else False
+
+        # small ints for the other integer columns
+        for col in ["open_period", "close_period"]:
+            if col in data.columns:
+                data[col] = data[col].astype("int8")
+        for col in ["open_possession", "close_possession"]:
+            if col in data.columns:
+                data[col] = data[col].astype("int32")
+        for col in ["open_time_in_secs", "close_time_in_secs"]:
+            if col in data.columns:
+                data[col] = data[col].astype("float32")
+
+        return cls(data)
+
+    @classmethod
+    def coerce(cls, one_twos):
+        """
+        :param one_twos: OneTwoPairs, or dataframe of one-twos (opening and closing pass in consecutive rows)
+        :return: OneTwoPairs, as given or built with from_one_twos
+        """
+        return one_twos if isinstance(one_twos, cls) else cls.from_one_twos(one_twos)
+
+    def to_one_twos(self, events=None):
+        """
+        convert back to the interleaved opening/closing row layout used by the plotting functions
+        :param events: optional passes to take the full event rows from - one match's dataframe, several concatenated,
+        or the dict {match_id: dataframe} of get_pass_data - looked up by event id, so the pairs must have been built
+        from frames with an id column
+        :return: dataframe, one-two passes with the opening and closing pass in consecutive rows
+        """
+        if len(self.data) == 0:
+            return pd.DataFrame([])
+        if isinstance(events, dict):
+            events = pd.concat(list(events.values()), ignore_index=True)
+
+        match_ids = np.repeat(self.data["match_id"].to_numpy(), 2)
+        event_index = np.column_stack([self.data["open_index"], self.data["close_index"]]).reshape(-1)
+        index = pd.MultiIndex.from_arrays([match_ids, event_index], names=["match", "event_index"])
+
+        if events is not None:
+            ids = np.column_stack([self.data["open_id"], self.data["close_id"]]).reshape(-1)
+            one_twos = events.drop_duplicates(subset="id").set_index("id").loc[ids].reset_index()
+            one_twos.index = index
+            # same extra location columns as get_one_twos (projected passes already have them)
+            if "location" in one_twos.columns:
+                one_twos[["x_start", "y_start"]] = pd.DataFrame(one_twos.location.tolist(), index=index)
+                one_twos[["x_end", "y_end"]] = pd.DataFrame(one_twos.pass_end_location.tolist(), index=index)
+            return one_twos
+
+        # only the columns we kept
+        one_twos = pd.DataFrame({
+            "player": np.column_stack([self.data["opener"].astype(object),
+                                       self.data["closer"].astype(object)]).reshape(-1),
+            "pass_recipient": np.column_stack([self.data["closer"].astype(object),
+                                               self.data["opener"].astype(object)]).reshape(-1),
+            "possession_team": np.repeat(self.data["team"].astype(object).to_numpy(), 2),
+            "match_id": match_ids,
+        }, index=index)
+        for col in ["id", "period", "possession", "time_in_secs"]:
+            if f"open_{col}" in self.data.columns:
+                one_twos[col] = np.column_stack([self.data[f"open_{col}"], self.data[f"close_{col}"]]).reshape(-1)
+        for col, values in self._interleave(COORDINATES).items():
+            one_twos[col] = values.astype(float)
+        one_twos["location"] = [[x, y] for x, y in zip(one_twos["x_start"], one_twos["y_start"])]
+        one_twos["pass_end_location"] = [[x, y] for x, y in zip(one_twos["x_end"], one_twos["y_end"])]
+        for flag, values in self._interleave(["shot_assist", "goal_assist"]).items():
+            # StatsBomb flags are True or missing
+            one_twos[f"pass_{flag}"] = np.where(values, True, None)
+
+        return one_twos
+
+    def _interleave(self, cols):
+        """
+        :return: dict, {col: array with the open_ and close_ values of col alternating}
+        """
+        return {col: np.column_stack([self.data[f"open_{col}"], self.data[f"close_{col}"]]).reshape(-1)
+                for col in cols}
+
+    @property
+    def opening(self):
+        """
+        :return: dataframe, the opening pass of every one-two (player, recipient, team and coordinates)
+        """
+        return self._side("open", "opener", "closer")
+
+    @property
+    def closing(self):
+        """
+        :return: dataframe, the closing pass of every one-two (player, recipient, team and coordinates)
+        """
+        return self._side("close", "closer", "opener")
+
+    def _side(self, side, player, recipient):
+        df = pd.DataFrame({"match_id": self.data["match_id"], "player": self.data[player],
+                           "pass_recipient": self.data[recipient], "team": self.data["team"]})
+        for col in self.data.columns:
+            if col.startswith(f"{side}_"):
+                df[col[len(side) + 1:]] = self.data[col]
+        return df
+
+    def per_player(self, frame):
+        """
+        both players are involved in a one-two, once as opener and once as closer - repeat a per one-two frame for each
+        of them, ready to group by player
+        :param frame: dataframe, one row per one-two in the same order as the pairs (e.g. from attribute_outcomes or
+        one_two_pressure)
+        :return: dataframe, frame's rows for the openers then for the closers, with a player column
+        """
+        return pd.concat([
+            frame.assign(player=self.data["opener"].to_numpy(dtype=object)),
+            frame.assign(player=self.data["closer"].to_numpy(dtype=object)),
+        ], ignore_index=True)
+
+    def for_player(self, player):
+        """
+        :param player: str, player name
+        :return: OneTwoPairs, only the one-twos the player opened or closed
+        """
+        keep = (self.data["opener"] == player).to_numpy() | (self.data["closer"] == player).to_numpy()
+        return OneTwoPairs(self.data[keep].reset_index(drop=True))
+
+    def memory_usage(self):
+        """
+        :return: int, bytes used by the pairs
+        """
+        return int(self.data.memory_usage(deep=True).sum())
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"OneTwoPairs({len(self)} one-twos)"
+
+
+def _pass_coordinates(rows):
+    """
+    start and end coordinates of a set of passes as float32, from the x_start... columns if they exist
+    :param rows: dataframe, passes
+    :return: array, shape (n, 4) of x_start, y_start, x_end, y_end
+    """
+    if all(col in rows.columns for col in COORDINATES):
+        return rows[COORDINATES].to_numpy(dtype=np.float32)
+
+    coords = np.full((len(rows), 4), np.nan, dtype=np.float32)
+    for i, (start, end) in enumerate(zip(rows["location"], rows["pass_end_location"])):
+        coords[i, :2] = start[:2]
+        coords[i, 2:] = end[:2]
+    return coords
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from one_two.pairs import OneTwoPairs
+
+
+class Partnerships:
+    """
+    who plays one-twos with whom - a sparse player x player matrix of one-twos (row = opener, column = closer) and one
+    of their key passes, built once from a season of one-twos
+    rows and columns are (player, team), ordered by team, so each team's matrix is one block of the league matrix
+    (team_matrix) - a player who played for more than one team has a row in each, with the one-twos they played for it
+    """
+
+    def __init__(self, players, teams, team_bounds, counts, keys):
+        """
+        :param players: array, player name of each row (grouped by team - a name can appear once per team)
+        :param teams: array, team names - team k's players are players[team_bounds[k]:team_bounds[k + 1]]
+        :param team_bounds: array, int start of each team's block of players (and the total at the end)
+        :param counts: csr_matrix, number of one-twos opened by row player and closed by column player
+        :param keys: csr_matrix, number of shot/goal assists in those one-twos (as for key_one_two_percentage)
+        """
+        self.players = players
+        self.teams = teams
+        self.team_bounds = team_bounds
+        self.counts = counts
+        self.keys = keys
+        # team of each row
+        self.player_teams = np.repeat(np.asarray(teams, dtype=object), np.diff(team_bounds))
+        self._player_pos = {}
+        for k, player in enumerate(players):
+            self._player_pos.setdefault(player, []).append(k)
+
+    @classmethod
+    def from_one_twos(cls, one_twos):
+        """
+        :param one_twos: OneTwoPairs, or dataframe of one-twos (opening and closing pass in consecutive rows) e.g. from
+        get_season_one_twos
+        :return: Partnerships
+        """
+        data = OneTwoPairs.coerce(one_twos).data
+        n_pairs = len(data)
+
+        # one code per (player, team), opener and closer together - both play for the team of the one-two
+        team_codes, teams = pd.factorize(data["team"].to_numpy(dtype=object), sort=True)
+        codes, player_keys = pd.MultiIndex.from_arrays([np.tile(team_codes, 2),
+                                                        np.concatenate([data["opener"].to_numpy(dtype=object),
+                                                                        data["closer"].to_numpy(dtype=object)])
+                                                        ]).factorize()
+        player_team = player_keys.get_level_values(0).to_numpy(dtype=np.int64)
+        players = player_keys.get_level_values(1).to_numpy(dtype=object)
+
+        # put the players in team (then name) order so each team is a block
+        position = np.empty(len(players), dtype=np.int64)
+        team_order = np.lexsort((players.astype(str), player_team))
+        position[team_order] = np.arange(len(players))
+        team_bounds = np.searchsorted(player_team[team_order], np.arange(len(teams) + 1))
+
+        opener = position[codes[:n_pairs]]
+        closer = position[codes[n_pairs:]]
+        key_count = data[["open_shot_assist", "open_goal_assist", "close_shot_assist",
+                          "close_goal_assist"]].to_numpy().sum(axis=1)
+        shape = (len(players), len(players))
+        counts = sparse.coo_matrix((np.ones(n_pairs, dtype=np.int64), (opener, closer)), shape=shape).tocsr()
+        keys = sparse.coo_matrix((key_count.astype(np.int64), (opener, closer)), shape=shape).tocsr()
+
+        return cls(players[team_order], np.asarray(teams, dtype=object), team_bounds, counts, keys)
+
+    def teams_of(self, player):
+        """
+        :param player: str, player name
+        :return: list, the teams the player played one-twos for
+        """
+        return list(self.player_teams[self._player_pos[player]])
+
+    def _positions(self, player, team=None):
+        """
+        :return: list, rows of the player (just the one for team if given)
+        """
+        positions = [pos for pos in self._player_pos[player] if team is None or self.player_teams[pos] == team]
+        if len(positions) == 0:
+            raise KeyError(f"{player} has no one-twos for {team}")
+        return positions
+
+    def team_matrix(self, team):
+        """
+        :param team: str, team name
+        :return: tuple, (player names, csr_matrix of that team's one-twos - row opener, column closer)
+        """
+        k = list(self.teams).index(team)
+        start, end = self.team_bounds[k], self.team_bounds[k + 1]
+        return self.players[start:end], self.counts[start:end, start:end]
+
+    def team_totals(self):
+        """
+        :return: dataframe, one row per team - number of one-twos, key passes, key pass percentage and number of
+        different partnerships (pairs of players, either way round) - most one-twos first
+        """
+        rows = []
+        for k, team in enumerate(self.teams):
+            start, end = self.team_bounds[k], self.team_bounds[k + 1]
+            block = self.counts[start:end, start:end]
+            n_one_twos = int(block.sum())
+            key_count = int(self.keys[start:end, start:end].sum())
+            rows.append({"team": team, "n_one_twos": n_one_twos, "key_count": key_count,
+                         "key_pc": 100*key_count/max(n_one_twos, 1),
+                         "n_partnerships": int(sparse.triu(block + block.T).count_nonzero())})
+
+        columns = ["team", "n_one_twos", "key_count", "key_pc", "n_partnerships"]
+        return pd.DataFrame(rows, columns=columns).sort_values("n_one_twos", ascending=False).reset_index(drop=True)
+
+    def top_partnerships(self, n=10, team=None, directed=False):
+        """
+        the pairs of players with the most one-twos
+        :param n: int, number of partnerships to return (None for all)
+        :param team: str, optional team to limit to
+        :param directed: bool, if True A opening/B closing and B opening/A closing are separate partnerships
+        :return: dataframe, player_a, player_b, team, count, key_count, key_pc (and a_opened - how many A opened)
+        """
+        counts, keys, offset = self.counts, self.keys, 0
+        if team is not None:
+            k = list(self.teams).index(team)
+            offset, end = self.team_bounds[k], self.team_bounds[k + 1]
+            counts = counts[offset:end, offset:end]
+            keys = keys[offset:end, offset:end]
+
+        if directed:
+            pair_counts, pair_keys = counts.tocoo(), keys
+        else:
+            pair_counts, pair_keys = sparse.triu(counts + counts.T).tocoo(), keys + keys.T
+        a = pair_counts.row
+        b = pair_counts.col
+        key_count = _entries(pair_keys, a, b)
+
+        partnerships = pd.DataFrame({
+            "player_a": self.players[a + offset],
+            "player_b": self.players[b + offset],
+            "count": pair_counts.data,
+            "a_opened": _entries(counts, a, b),
+            "key_count": key_count,
+            "key_pc": 100*key_count/pair_counts.data,
+        })
+        partnerships.insert(2, "team", self.player_teams[a + offset])
+        partnerships = partnerships.sort_values(["count", "player_a", "player_b"],
+                                                ascending=[False, True, True]).reset_index(drop=True)
+
+        return partnerships if n is None else partnerships.head(n)
+
+    def partners(self, player, team=None, n=None):
+        """
+        a player's one-two partners
+        :param player: str, player name
+        :param team: str, optional team - only the one-twos the player played for it (all their teams by default)
+        :param n: int, optional number of partners to return
+        :return: dataframe, partner, team, opened (one-twos the player opened and the partner closed), closed (the
+        other way round), total, key_count, key_pc - most one-twos first
+        """
+        pos = self._positions(player, team)
+        opened = np.asarray(self.counts[pos, :].sum(axis=0)).ravel()
+        closed = np.asarray(self.counts[:, pos].sum(axis=1)).ravel()
+        key_count = np.asarray(self.keys[pos, :].sum(axis=0)).ravel() + np.asarray(self.keys[:, pos].sum(axis=1)).ravel()
+        total = opened + closed
+        found = np.flatnonzero(total)
+
+        partners = pd.DataFrame({
+            "partner": self.players[found],
+            "team": self.player_teams[found],
+            "opened": opened[found],
+            "closed": closed[found],
+            "total": total[found],
+            "key_count": key_count[found],
+            "key_pc": 100*key_count[found]/total[found],
+        }).sort_values(["total", "partner"], ascending=[False, True]).reset_index(drop=True)
+
+        return partners if n is None else partners.head(n)
+
+    def __repr__(self):
+        return f"Partnerships({len(self._player_pos)} players, {len(self.teams)} teams, {int(self.counts.sum())} one-twos)"
+
+
+def _entries(matrix, rows, cols):
+    """
+    :return: array, matrix[rows[k], cols[k]] for each k (scipy gives back a matrix rather than values for no entries)
+    """
+    if len(rows) == 0:
+        return np.zeros(0, dtype=matrix.dtype)
+    return np.asarray(matrix[rows, cols]).ravel()
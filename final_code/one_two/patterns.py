@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+from one_two.functions import _pass_xy
+from one_two import profiling
+
+# named patterns - each letter is a player (same letter same player, different letters different players) and each
+# dash is a completed pass, so "A-B-C-A" is A to B, B to C and C back to A
+PATTERNS = {
+    "one-two": "A-B-A",
+    "third man": "A-B-C-A",
+    "give and go twice": "A-B-A-B-A",
+    "switch": "A-B-C-B",
+}
+
+
+def parse_pattern(pattern):
+    """
+    :param pattern: str, a pattern like "A-B-C-A" (or a name from PATTERNS)
+    :return: list, the players (letters) of the pattern in order
+    """
+    letters = PATTERNS.get(pattern, pattern).split("-")
+    if len(letters) < 2:
+        raise ValueError(f"a pattern needs at least one pass: {pattern}")
+    if any(a == b for a, b in zip(letters[:-1], letters[1:])):
+        raise ValueError(f"a player can't pass to themselves: {pattern}")
+
+    return letters
+
+
+def mine_patterns(passes, patterns=("A-B-A",), sec_threshold=5, prog_threshold=0.75, carry_threshold=5,
+                  by_possession=False):
+    """
+    find every run of consecutive completed passes by one team that follows a pattern, with the same thresholds as
+    get_one_twos applied to the whole run (see attached report):
+        time - from the first pass to the last, no more than sec_threshold seconds (within one period)
+        progression - the end of the last pass is nearer the goal line or the goal than the start of the first,
+        by the prog_threshold factor (None to skip)
+        carry - every player in the middle of the run moves less than carry_threshold between receiving the ball and
+        passing it on (None to skip)
+    passes must follow each other (each pass is played by whoever received the one before), so "A-B-A" finds the
+    one-twos of get_one_twos that have no other pass in between
+    each pattern is one sliding window over the pass sequence, narrowed down a pass at a time with array comparisons
+    :param passes: dataframe of one match's passes, or dict {match_id: passes} / iterable of (match_id, passes) as from
+    get_pass_data or iter_match_passes (projected passes work too)
+    :param patterns: list, patterns like "A-B-C-A" or names from PATTERNS
+    :param sec_threshold: float, time threshold for the whole run
+    :param prog_threshold: float, progression threshold
+    :param carry_threshold: float, carry threshold
+    :param by_possession: bool, if True every pass must be in the same possession
+    :return: dataframe, one row per match of a pattern - match_id, pattern (as given, name or spec), team, the player of
+    each letter, the index of each pass (pass_1_index, ... - nullable Int64, missing past the end of shorter patterns),
+    start time and length in seconds, start of the first pass, end of the last pass and key_count (shot and goal
+    assists among the passes)
+    """
+    arrays = _pass_arrays(passes)
+
+    mined = []
+    for pattern in patterns:
+        with profiling.stage("mine patterns", rows=len(arrays["player"])) as record:
+            found = _mine_pattern(arrays, parse_pattern(pattern), sec_threshold, prog_threshold, carry_threshold,
+                                  by_possession)
+            found.insert(1, "pattern", pattern)
+            record["rows"] = len(found)
+        mined.append(found)
+
+    mined = pd.concat(mined, ignore_index=True)
+    # shorter patterns have no later passes - keep the event indices integers rather than float with nan
+    for col in mined.columns:
+        if col.startswith("pass_") and col.endswith("_index") and pd.api.types.is_numeric_dtype(mined[col]):
+            mined[col] = mined[col].astype("Int64")
+
+    return mined
+
+
+def _pass_arrays(passes):
+    """
+    every match's passes as one set of numpy arrays, in match then event order
+    :return: dict, of arrays (player names as shared integer codes, missing names -1)
+    """
+    if isinstance(passes, pd.DataFrame):
+        frames = [(None, passes)]
+    elif isinstance(passes, dict):
+        frames = list(passes.items())
+    else:
+        frames = list(passes)
+    frames = [(match_id, df) for match_id, df in frames if len(df) > 0]
+
+    starts, ends = [], []
+    for _, df in frames:
+        start, end = _pass_xy(df)
+        starts.append(start)
+        ends.append(end)
+
+    def column(col, dtype=None):
+        return np.concatenate([df[col].to_numpy(dtype=dtype) for _, df in frames]) if len(frames) > 0 else \
+            np.array([], dtype=dtype)
+
+    def flag(col):
+        return np.concatenate([df[col].eq(True).to_numpy() if col in df.columns else np.zeros(len(df), dtype=bool)
+                               for _, df in frames]) if len(frames) > 0 else np.array([], dtype=bool)
+
+    match_ids = np.concatenate([df["match_id"].to_numpy(dtype=object) if match_id is None else
+                                np.full(len(df), match_id, dtype=object) for match_id, df in frames]) \
+        if len(frames) > 0 else np.array([], dtype=object)
+    player = column("player", object)
+    codes, players = pd.factorize(np.concatenate([player, column("pass_recipient", object)]))
+
+    return {
+        "match_id": match_ids,
+        "match": pd.factorize(match_ids)[0],
+        "index": np.concatenate([np.asarray(df.index) for _, df in frames]) if len(frames) > 0 else np.array([]),
+        "team": pd.factorize(column("possession_team", object))[0],
+        "team_name": column("possession_team", object),
+        "player": codes[:len(player)],
+        "recipient": codes[len(player):],
+        "players": np.asarray(players, dtype=object),
+        "time": column("minute", float)*60 + column("second", float),
+        "period": column("period"),
+        "possession": column("possession") if all("possession" in df.columns for _, df in frames) else None,
+        "start": np.concatenate(starts) if len(frames) > 0 else np.empty((0, 2)),
+        "end": np.concatenate(ends) if len(frames) > 0 else np.empty((0, 2)),
+        "key": (flag("pass_shot_assist").astype(int) + flag("pass_goal_assist").astype(int)),
+    }
+
+
+def _mine_pattern(arrays, letters, sec_threshold, prog_threshold, carry_threshold, by_possession):
+    """
+    one pattern over the whole pass sequence - pos holds the first pass of every run still possible and is cut down
+    by each test in turn, cheapest first
+    :return: dataframe, one row per run found
+    """
+    n_passes = len(letters) - 1
+    player, recipient = arrays["player"], arrays["recipient"]
+    pos = np.arange(max(len(player) - n_passes + 1, 0))
+
+    # the passes follow each other within one match and team (and possession)
+    for i in range(1, n_passes):
+        keep = ((arrays["match"][pos + i] == arrays["match"][pos]) & (arrays["team"][pos + i] == arrays["team"][pos]) &
+                (player[pos + i] == recipient[pos + i - 1]) & (arrays["period"][pos + i] == arrays["period"][pos]))
+        if by_possession:
+            keep &= arrays["possession"][pos + i] == arrays["possession"][pos]
+        pos = pos[keep]
+
+    # the players the letters stand for - the passer of the first pass then the recipient of each pass
+    seq = [player[pos]] + [recipient[pos + i] for i in range(n_passes)]
+    keep = seq[0] >= 0
+    for a in range(len(letters)):
+        keep &= seq[a] >= 0
+        for b in range(a + 1, len(letters)):
+            keep &= (seq[a] == seq[b]) if letters[a] == letters[b] else (seq[a] != seq[b])
+    pos = pos[keep]
+
+    # time from the first pass to the last
+    time = arrays["time"]
+    pos = pos[time[pos + n_passes - 1] - time[pos] <= sec_threshold]
+
+    # no one in the middle carries the ball too far
+    start, end = arrays["start"], arrays["end"]
+    if carry_threshold is not None:
+        for i in range(1, n_passes):
+            carry = np.sqrt(np.sum(np.power(end[pos + i - 1] - start[pos + i], 2), axis=1))
+            pos = pos[carry < carry_threshold]
+
+    # the run gets nearer the goal line or the goal (same tests as _one_two_distances)
+    first_start = start[pos]
+    last_end = end[pos + n_passes - 1]
+    if prog_threshold is not None:
+        line_start = 120 - first_start[:, 0]
+        line_end = 120 - last_end[:, 0]
+        goal_start = np.sqrt(np.power(first_start[:, 0] - 120, 2) + np.power(first_start[:, 1] - 40, 2))
+        goal_end = np.sqrt(np.power(last_end[:, 0] - 120, 2) + np.power(last_end[:, 1] - 40, 2))
+        keep = (line_end < line_start*prog_threshold) | (goal_end < goal_start*prog_threshold)
+        pos, first_start, last_end = pos[keep], first_start[keep], last_end[keep]
+
+    # one row per run
+    found = pd.DataFrame({"match_id": arrays["match_id"][pos], "team": arrays["team_name"][pos]})
+    seq = [player[pos]] + [recipient[pos + i] for i in range(n_passes)]
+    for k, letter in enumerate(letters):
+        if letter not in found.columns:
+            found[letter] = arrays["players"][seq[k]]
+    for i in range(n_passes):
+        found[f"pass_{i + 1}_index"] = arrays["index"][pos + i]
+    found["time_in_secs"] = time[pos]
+    found["seconds"] = time[pos + n_passes - 1] - time[pos]
+    found["x_start"], found["y_start"] = first_start[:, 0], first_start[:, 1]
+    found["x_end"], found["y_end"] = last_end[:, 0], last_end[:, 1]
+    found["key_count"] = sum(arrays["key"][pos + i] for i in range(n_passes))
+
+    return found
+
+
+def pattern_player_counts(mined):
+    """
+    how many runs of each pattern every player was part of
+    :param mined: dataframe, output of mine_patterns
+    :return: dataframe, one row per player and team with a column per pattern (most runs first)
+    """
+    letter_cols = [col for col in mined.columns if len(col) == 1 and col.isalpha()]
+
+    # each player once per run, whichever letter(s) they were
+    per_player = mined.reset_index().melt(id_vars=["index", "pattern", "team"], value_vars=letter_cols,
+                                          value_name="player").dropna(subset=["player"])
+    per_player = per_player.drop_duplicates(["index", "player"])
+    counts = per_player.pivot_table(index=["player", "team"], columns="pattern", values="index", aggfunc="count",
+                                    fill_value=0)
+    counts.columns.name = None
+    counts["total"] = counts.sum(axis=1)
+
+    return counts.sort_values("total", ascending=False).reset_index()
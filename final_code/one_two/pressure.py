@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from one_two.pairs import OneTwoPairs
+
+# per one-two pressure features (see one_two_pressure)
+PRESSURE_COLUMNS = ["opponents_bypassed", "open_nearest_opponent", "close_nearest_opponent", "open_density",
+                    "close_density"]
+
+
+def one_two_pressure(one_twos, store, radius=5):
+    """
+    defensive pressure on every one-two from the 360 freeze frames of its two passes, computed for all the one-twos
+    at once (so a whole competition is one call)
+        opponents_bypassed - opponents goal-side of the ball when the one-two was opened, less those still goal-side
+        of the ball when it was returned (never below 0), nan if either pass has no freeze frame
+        open/close_nearest_opponent - distance from the receiver of each pass (the end of the pass) to the nearest
+        opponent, nan if the pass has no freeze frame
+        open/close_density - opponents within radius of the receiver of each pass, nan if the pass has no freeze frame
+    StatsBomb coordinates always have the team in possession attacking towards x=120, so goal-side means larger x
+    :param one_twos: OneTwoPairs, or dataframe of one-twos (opening and closing pass in consecutive rows) with id columns
+    :param store: FreezeFrameStore, holding the frames of the one-two passes (see one_two.freeze_frames)
+    :param radius: float, distance (yards) around the receiver counted for the density
+    :return: dataframe, one row per one-two (same order as the pairs) with the PRESSURE_COLUMNS
+    """
+    data = OneTwoPairs.coerce(one_twos).data
+    features = pd.DataFrame(index=data.index)
+
+    for side in ["open", "close"]:
+        ids = data[f"{side}_id"].to_numpy()
+        receiver = data[[f"{side}_x_end", f"{side}_y_end"]].to_numpy(dtype=np.float32)
+        features[f"{side}_nearest_opponent"] = store.nearest_distance(ids, receiver)
+        features[f"{side}_density"] = store.count_near(ids, receiver, radius)
+
+    # opponents ahead of the ball at the start of the one-two and at the end of it
+    ahead_open = _count_ahead(store, data["open_id"].to_numpy(), data["open_x_start"].to_numpy(dtype=np.float32))
+    ahead_close = _count_ahead(store, data["close_id"].to_numpy(), data["close_x_end"].to_numpy(dtype=np.float32))
+    # (nan propagates, so a missing frame at either end leaves it unknown)
+    features["opponents_bypassed"] = np.maximum(ahead_open - ahead_close, 0)
+
+    return features[PRESSURE_COLUMNS]
+
+
+def _count_ahead(store, event_ids, ball_x):
+    """
+    :return: array, number of opponents in each event's frame with a larger x than the ball (nan without a frame)
+    """
+    rows = store.rows_of(event_ids)
+    owner, player = store.players_of(rows)
+    opponent = ~np.asarray(store.teammate)[player]
+    ahead = opponent & (np.asarray(store.positions)[player, 0] > ball_x[owner])
+
+    counts = np.bincount(owner[ahead], minlength=len(event_ids)).astype(float)
+    counts[rows < 0] = np.nan
+
+    return counts
+
+
+def player_pressure(one_twos, features):
+    """
+    average pressure features for each player over the one-twos they opened or closed - merge with get_player_counts
+    on player to add them to the leaderboard
+    :param one_twos: OneTwoPairs, or dataframe of one-twos, the features were computed for
+    :param features: dataframe, output of one_two_pressure
+    :return: dataframe, one row per player with the mean of each feature (nan - missing frames - are skipped)
+    """
+    per_player = OneTwoPairs.coerce(one_twos).per_player(features)
+
+    return per_player.groupby("player", sort=True)[PRESSURE_COLUMNS].mean().reset_index()
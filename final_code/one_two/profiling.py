@@ -0,0 +1,163 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+# the profiler stages report to - None (the default) means profiling is off and stage() does nothing
+_active = None
+
+
+class Profiler:
+    """
+    records how long each stage of a run takes (per match where there is one), how many rows it handled and how much
+    memory it allocated - switch it on with start() and every stage() block in the one_two functions reports to it
+    stages run in worker processes (get_season_one_twos with workers > 1) are not recorded
+    """
+
+    def __init__(self, trace_path=None, cprofile_dir=None, memory=True):
+        """
+        :param trace_path: str, optional file to write every stage record to - .csv for csv, anything else is json
+        :param cprofile_dir: str, optional folder to write a cProfile dump per stage to ({stage}.prof)
+        :param memory: bool, if True track memory with tracemalloc (slows python code down a bit)
+        """
+        self.trace_path = trace_path
+        self.cprofile_dir = cprofile_dir
+        self.memory = memory
+        self.records = []
+        self._profiles = {}
+        self._profiling = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, match_id=None, rows=None):
+        record = {"stage": name, "match_id": None if match_id is None else str(match_id), "rows": rows}
+        mem_before = tracemalloc.get_traced_memory()[0] if self.memory else 0
+
+        # cProfile can only profile one thing at a time, so nested stages count towards the outer one (and stages run
+        # on the file reading threads aren't profiled)
+        profile = None
+        with self._lock:
+            if self.cprofile_dir is not None and not self._profiling and threading.current_thread() is \
+                    threading.main_thread():
+                profile = self._profiles.setdefault(name, cProfile.Profile())
+                self._profiling = True
+        if profile is not None:
+            profile.enable()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+            if self.memory:
+                record["memory_mb"] = (tracemalloc.get_traced_memory()[0] - mem_before)/1e6
+            self.records.append(record)
+
+    def summary(self):
+        """
+        :return: dataframe, one row per stage - calls, total and mean seconds, rows, rows/sec and memory
+        """
+        trace = pd.DataFrame(self.records, columns=["stage", "match_id", "rows", "seconds", "memory_mb"])
+        trace["rows"] = pd.to_numeric(trace["rows"])
+        summary = trace.groupby("stage", sort=False).agg(calls=("seconds", "size"), seconds=("seconds", "sum"),
+                                                         mean_seconds=("seconds", "mean"),
+                                                         rows=("rows", lambda rows: rows.sum(min_count=1)),
+                                                         memory_mb=("memory_mb", "sum"))
+        summary["rows_per_sec"] = summary["rows"]/summary["seconds"].clip(lower=1e-9)
+
+        return summary.sort_values("seconds", ascending=False).reset_index()
+
+    def write_trace(self, path=None):
+        """
+        :param path: str, file to write to (defaults to trace_path) - .csv for csv, anything else is json
+        """
+        path = path or self.trace_path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if path.endswith(".csv"):
+            pd.DataFrame(self.records).to_csv(path, index=False)
+        else:
+            with open(path, "w") as f:
+                json.dump(self.records, f, indent=2)
+
+    def dump_profiles(self):
+        """
+        write each stage's cProfile stats to cprofile_dir (open them with pstats or snakeviz)
+        """
+        os.makedirs(self.cprofile_dir, exist_ok=True)
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(self.cprofile_dir, f"{name.replace(' ', '_')}.prof"))
+
+
+@contextmanager
+def stage(name, match_id=None, rows=None):
+    """
+    time a block of code as a stage of the active profiler - does nothing if profiling is off
+    set record["rows"] inside the block if the row count isn't known up front
+    :param name: str, stage name
+    :param match_id: optional match the stage is working on
+    :param rows: int, optional number of rows handled
+    :return: dict, the stage record
+    """
+    if _active is None:
+        yield {}
+    else:
+        with _active.stage(name, match_id, rows) as record:
+            yield record
+
+
+def timed(name):
+    """
+    decorator version of stage, for functions that are a stage in themselves (e.g. the plots)
+    :param name: str, stage name
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start(trace_path=None, cprofile_dir=None, memory=True):
+    """
+    switch profiling on
+    :return: Profiler, the active profiler
+    """
+    global _active
+    _active = Profiler(trace_path=trace_path, cprofile_dir=cprofile_dir, memory=memory)
+    if memory:
+        tracemalloc.start()
+    return _active
+
+
+def stop():
+    """
+    switch profiling off, print the summary table and write the trace and cProfile dumps (if asked for)
+    :return: Profiler, the profiler that was active (or None)
+    """
+    global _active
+    profiler = _active
+    _active = None
+    if profiler is None:
+        return None
+
+    if profiler.memory:
+        tracemalloc.stop()
+    pd.set_option("display.width", 120)
+    print(profiler.summary().to_string(index=False))
+    if profiler.trace_path is not None:
+        profiler.write_trace()
+    if profiler.cprofile_dir is not None:
+        profiler.dump_profiles()
+
+    return profiler
@@ -0,0 +1,145 @@
+import itertools
+import numpy as np
+import pandas as pd
+from one_two.functions import iter_match_passes, _return_pass_candidates, _one_two_distances, _count_flag
+
+# columns of find_candidates
+CANDIDATE_COLUMNS = ["open_index", "close_index", "opener", "closer", "team", "seconds", "line_start", "line_end",
+                     "goal_start", "goal_end", "pass_dist", "key_count"]
+
+
+def find_candidates(match, max_seconds):
+    """
+    find every return pass (B passes back to A within max_seconds of A passing to B) in a match, with the distances
+    the progression and carry thresholds are tested against - so any thresholds up to max_seconds can be applied
+    later without searching the passes again (see sweep_thresholds)
+    :param match: dataframe, passes for one match (as from iter_match_passes)
+    :param max_seconds: float, the widest time threshold that will be tested
+    :return: dataframe, one row per candidate one-two
+    """
+    match = match.copy()
+    match["time_in_secs"] = match["minute"]*60 + match["second"]
+
+    open_pos, close_pos = _return_pass_candidates(match, max_seconds)
+    line_start, line_end, goal_start, goal_end, pass_dist = _one_two_distances(match, open_pos, close_pos)
+    times = match["time_in_secs"].to_numpy(dtype=float)
+
+    # a candidate is a key pass if either pass is a shot or goal assist
+    key = np.zeros(len(open_pos), dtype=int)
+    for col in ["pass_shot_assist", "pass_goal_assist"]:
+        if _count_flag(match, col) > 0:
+            flag = match[col].eq(True).to_numpy()
+            key += flag[open_pos].astype(int) + flag[close_pos].astype(int)
+
+    return pd.DataFrame({
+        "open_index": match.index[open_pos],
+        "close_index": match.index[close_pos],
+        "opener": match["player"].to_numpy(dtype=object)[open_pos],
+        "closer": match["player"].to_numpy(dtype=object)[close_pos],
+        "team": match["possession_team"].to_numpy(dtype=object)[open_pos],
+        "seconds": times[close_pos] - times[open_pos],
+        "line_start": line_start,
+        "line_end": line_end,
+        "goal_start": goal_start,
+        "goal_end": goal_end,
+        "pass_dist": pass_dist,
+        "key_count": key,
+    })
+
+
+def find_season_candidates(comp, season, path, max_seconds, cache=None, columns=None, open_data_path=None):
+    """
+    find_candidates for every match in a season, loading the matches one at a time
+    :param comp: int, competition id
+    :param season: int, season id
+    :param path: str, path to retrieve 360 data
+    :param max_seconds: float, the widest time threshold that will be tested
+    :param cache: PassCache, optional on-disk cache of the pass data (see one_two.cache)
+    :param columns: list, optional columns to keep (e.g. PASS_COLUMNS) - see project_passes
+    :param open_data_path: str, optional path to a local open-data clone (see get_pass_data)
+    :return: dataframe, one row per candidate one-two with a match_id column
+    """
+    candidates = []
+    for match_id, passes_df in iter_match_passes(comp, season, None, path, all_teams=True, cache=cache,
+                                                 columns=columns, open_data_path=open_data_path):
+        match_candidates = find_candidates(passes_df, max_seconds)
+        match_candidates.insert(0, "match_id", match_id)
+        candidates.append(match_candidates)
+
+    if len(candidates) == 0:
+        return pd.DataFrame(columns=["match_id"] + CANDIDATE_COLUMNS)
+    return pd.concat(candidates, ignore_index=True)
+
+
+def sweep_thresholds(candidates, sec_thresholds, prog_thresholds, carry_thresholds, per_player=False):
+    """
+    count the one-twos for every combination of thresholds (see attached report for what they mean)
+    by masking the candidates, rather than running get_one_twos once per setting
+    :param candidates: dataframe, from find_candidates/find_season_candidates with max_seconds >= max(sec_thresholds)
+    :param sec_thresholds: list, time thresholds to test
+    :param prog_thresholds: list, progression thresholds to test
+    :param carry_thresholds: list, carry thresholds to test
+    :param per_player: bool, if True also return open/close/total counts and key pass percentage per player
+    :return: dataframe, one row per threshold combination with the number of one-twos and key pass percentage
+    (and if per_player, a second dataframe with one row per combination and player involved)
+    """
+    sec_thresholds = np.asarray(sec_thresholds, dtype=float)
+    prog_thresholds = np.asarray(prog_thresholds, dtype=float)
+    carry_thresholds = np.asarray(carry_thresholds, dtype=float)
+
+    seconds = candidates["seconds"].to_numpy()
+    line_start = candidates["line_start"].to_numpy()
+    line_end = candidates["line_end"].to_numpy()
+    goal_start = candidates["goal_start"].to_numpy()
+    goal_end = candidates["goal_end"].to_numpy()
+    pass_dist = candidates["pass_dist"].to_numpy()
+    key_count = candidates["key_count"].to_numpy()
+
+    # same tests as get_one_twos, one row of the mask per threshold value
+    sec_ok = seconds[None, :] <= sec_thresholds[:, None]
+    prog_ok = ((line_end[None, :] < line_start[None, :]*prog_thresholds[:, None]) |
+               (goal_end[None, :] < goal_start[None, :]*prog_thresholds[:, None]))
+    carry_ok = pass_dist[None, :] < carry_thresholds[:, None]
+
+    # combine into one row per grid point
+    mask = (sec_ok[:, None, None, :] & prog_ok[None, :, None, :] & carry_ok[None, None, :, :])
+    mask = mask.reshape(len(sec_thresholds)*len(prog_thresholds)*len(carry_thresholds), len(candidates))
+
+    grid = pd.DataFrame(list(itertools.product(sec_thresholds, prog_thresholds, carry_thresholds)),
+                        columns=["threshold_seconds", "threshold_progression", "threshold_carry"])
+    grid_idx, cand_idx = np.nonzero(mask)
+    grid["n_one_twos"] = np.bincount(grid_idx, minlength=len(grid))
+    # same key pass percentage as key_one_two_percentage (shot and goal assists per one-two)
+    n_key = np.bincount(grid_idx, weights=key_count[cand_idx], minlength=len(grid))
+    grid["key_pc"] = 100*n_key/np.maximum(grid["n_one_twos"].to_numpy(), 1)
+
+    if not per_player:
+        return grid
+
+    # count every (grid point, player) pair in one bincount
+    codes, players = pd.factorize(pd.concat([candidates["opener"], candidates["closer"]], ignore_index=True))
+    opener = codes[:len(candidates)]
+    closer = codes[len(candidates):]
+    n_players = len(players)
+    size = len(grid)*n_players
+    open_count = np.bincount(grid_idx*n_players + opener[cand_idx], minlength=size)
+    close_count = np.bincount(grid_idx*n_players + closer[cand_idx], minlength=size)
+    key_open = np.bincount(grid_idx*n_players + opener[cand_idx], weights=key_count[cand_idx], minlength=size)
+    key_close = np.bincount(grid_idx*n_players + closer[cand_idx], weights=key_count[cand_idx], minlength=size)
+
+    player_stats = pd.DataFrame({
+        "grid_point": np.repeat(np.arange(len(grid)), n_players),
+        "player": np.tile(np.asarray(players, dtype=object), len(grid)),
+        "open_count": open_count,
+        "close_count": close_count,
+    })
+    player_stats["total_count"] = player_stats["open_count"] + player_stats["close_count"]
+    key = key_open + key_close
+    player_stats["key_pc"] = 100*key/np.maximum(player_stats["total_count"].to_numpy(), 1)
+    player_stats = player_stats[player_stats["total_count"] > 0]
+
+    # add the thresholds of each grid point
+    player_stats = grid.drop(columns=["n_one_twos", "key_pc"]).iloc[player_stats["grid_point"]].reset_index(
+        drop=True).join(player_stats.drop(columns=["grid_point"]).reset_index(drop=True))
+
+    return grid, player_stats
@@ -0,0 +1,121 @@
+import uuid
+import numpy as np
+import pandas as pd
+
+# share of passes that go straight back to the previous passer, so a synthetic match has a realistic number of
+# one-two candidates
+RETURN_PASS_RATE = 0.3
+
+
+def synthetic_match_passes(n_passes=900, seed=0, match_id=1, teams=("Home FC", "Away FC"), with_360=False):
+    """
+    make up the completed passes of one match in the same shape as load_match_passes, for benchmarking without
+    StatsBomb data
+    :param n_passes: int, number of passes in the match
+    :param seed: int, random seed - the same seed always gives the same match
+    :param match_id: int, id number to give the match
+    :param teams: tuple, the two team names
+    :param with_360: bool, if True add freeze_frame/visible_area columns with a random frame for every pass
+    :return: dataframe, passes with the StatsBomb columns used by the one_two functions
+    """
+    rng = np.random.default_rng(seed)
+    squads = {team: np.array([f"{team} Player {k}" for k in range(11)], dtype=object) for team in teams}
+
+    # time between passes, and when possession changes hands
+    secs = np.cumsum(rng.exponential(3.0, n_passes))
+    secs = secs*(90*60/max(secs[-1], 1.0))
+    turnover = rng.random(n_passes) < 0.1
+    turnover[0] = False
+    possession = np.cumsum(turnover) + 1
+    team_idx = possession % 2
+
+    player = np.empty(n_passes, dtype=object)
+    recipient = np.empty(n_passes, dtype=object)
+    start = np.column_stack([rng.uniform(0, 120, n_passes), rng.uniform(0, 80, n_passes)])
+    ends = np.empty((n_passes, 2))
+    for i in range(n_passes):
+        squad = squads[teams[team_idx[i]]]
+        if i > 0 and not turnover[i] and rng.random() < RETURN_PASS_RATE:
+            # give it back to whoever passed to us, near where we got it
+            player[i] = recipient[i - 1]
+            recipient[i] = player[i - 1]
+            start[i] = np.clip(ends[i - 1] + rng.normal(0, 2, 2), [0, 0], [120, 80])
+        else:
+            a, b = rng.choice(11, size=2, replace=False)
+            player[i] = squad[a]
+            recipient[i] = squad[b]
+        ends[i] = np.clip(start[i] + [rng.normal(8, 12), rng.normal(0, 10)], [0, 0], [120, 80])
+
+    minute = (secs//60).astype(int)
+    team = np.array([teams[k] for k in team_idx], dtype=object)
+    passes_df = pd.DataFrame({
+        "id": [str(uuid.UUID(int=int(rng.integers(2**62)) << 64 | i)) for i in range(n_passes)],
+        "index": np.arange(1, n_passes + 1),
+        "period": np.where(minute < 45, 1, 2),
+        "minute": minute,
+        "second": (secs % 60).astype(int),
+        "type": "Pass",
+        "possession": possession,
+        "possession_team": team,
+        "team": team,
+        "player": player,
+        "location": start.tolist(),
+        "pass_recipient": recipient,
+        "pass_end_location": ends.tolist(),
+        "pass_outcome": np.nan,
+        "pass_shot_assist": _flags(rng.random(n_passes) < 0.03),
+        "pass_goal_assist": _flags(rng.random(n_passes) < 0.005),
+        "match_id": match_id,
+    })
+
+    if with_360:
+        passes_df["event_uuid"] = passes_df["id"]
+        passes_df["visible_area"] = [[0.0, 0.0, 120.0, 0.0, 120.0, 80.0, 0.0, 80.0]]*n_passes
+        passes_df["freeze_frame"] = [_synthetic_frame(rng, loc) for loc in start]
+
+    return passes_df
+
+
+def _flags(mask):
+    """
+    :param mask: array, bool
+    :return: array, True where mask is and nan elsewhere - StatsBomb flags are True or missing
+    """
+    flags = np.full(len(mask), np.nan, dtype=object)
+    flags[mask] = True
+    return flags
+
+
+def _synthetic_frame(rng, ball, n_players=16):
+    """
+    a random freeze frame around the ball - the passer plus a mix of teammates and opponents
+    """
+    xy = np.clip(ball + rng.normal(0, 20, (n_players, 2)), [0, 0], [120, 80])
+    frame = [{"teammate": True, "actor": True, "keeper": False, "location": [float(ball[0]), float(ball[1])]}]
+    for k in range(n_players):
+        frame.append({"teammate": bool(k % 2), "actor": False, "keeper": k == 0,
+                      "location": [float(xy[k, 0]), float(xy[k, 1])]})
+    return frame
+
+
+def synthetic_season(n_matches=10, n_teams=12, passes_per_match=900, seed=0, with_360=False):
+    """
+    a set of synthetic matches between n_teams teams - scale n_matches up to several seasons' worth
+    :param n_matches: int, number of matches
+    :param n_teams: int, number of teams playing
+    :param passes_per_match: int, completed passes in each match
+    :param seed: int, random seed
+    :param with_360: bool, if True add random freeze frames
+    :return: dict, {match_id: passes dataframe} as from get_pass_data
+    """
+    rng = np.random.default_rng(seed)
+    teams = [f"Team {k}" for k in range(n_teams)]
+
+    all_passes = {}
+    for k in range(n_matches):
+        home, away = rng.choice(n_teams, size=2, replace=False)
+        match_id = 1000 + k
+        all_passes[str(match_id)] = synthetic_match_passes(passes_per_match, seed=seed + k, match_id=match_id,
+                                                           teams=(teams[home], teams[away]), with_360=with_360)
+
+    return all_passes
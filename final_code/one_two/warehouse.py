@@ -0,0 +1,247 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from one_two.functions import iter_match_passes, _pass_xy, PASS_COLUMNS
+from one_two.pairs import OneTwoPairs
+from one_two.sweep import find_candidates
+from one_two import profiling
+
+# duckdb is only needed for sql queries
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# partition columns, outermost first - each match is one folder (competition_id=53/season_id=106/match_id=3844385)
+PARTITIONS = ["competition_id", "season_id", "match_id"]
+
+# widest time threshold stored by default - queries can use any thresholds up to it
+MAX_SECONDS = 10
+
+
+class OneTwoWarehouse:
+    """
+    on-disk Parquet dataset of the candidate one-twos (every return pass within max_seconds, with the distances the
+    thresholds are tested against - see sweep.find_candidates) of many seasons, partitioned by competition, season and
+    match, so one-twos for any thresholds can be queried across seasons without loading or searching the passes again
+    queries filter with pyarrow dataset expressions - whole partitions are skipped on competition/season/match and
+    row groups on their column statistics, so a query only reads the seasons it asks for
+    """
+
+    def __init__(self, root, max_seconds=MAX_SECONDS):
+        """
+        :param root: str, folder of the dataset
+        :param max_seconds: float, widest time threshold stored when adding seasons (an existing warehouse keeps the
+        one it was built with)
+        """
+        self.root = root
+        meta = self._read_meta()
+        self.max_seconds = meta["max_seconds"] if meta is not None else max_seconds
+
+    def _meta_path(self):
+        # (files starting with _ are skipped when the dataset is read)
+        return os.path.join(self.root, "_warehouse.json")
+
+    def _read_meta(self):
+        if not os.path.exists(self._meta_path()):
+            return None
+        with open(self._meta_path(), "r") as f:
+            return json.load(f)
+
+    def add_matches(self, competition_ID, season_ID, matches):
+        """
+        find the candidate one-twos of some matches and write them to the warehouse (replacing those matches if they
+        are already there)
+        :param competition_ID: int, id number of competition
+        :param season_ID: int, id number of season
+        :param matches: iterable, of (match_id, passes dataframe) pairs, as from iter_match_passes with all_teams=True
+        :return: int, number of candidate one-twos written
+        """
+        frames = []
+        for match_id, passes_df in matches:
+            with profiling.stage("warehouse features", match_id, rows=len(passes_df)):
+                frames.append(match_features(passes_df, self.max_seconds))
+        if len(frames) == 0:
+            return 0
+        features = pd.concat(frames, ignore_index=True)
+        features.insert(0, "season_id", np.int32(season_ID))
+        features.insert(0, "competition_id", np.int32(competition_ID))
+
+        os.makedirs(self.root, exist_ok=True)
+        with profiling.stage("warehouse write", rows=len(features)):
+            ds.write_dataset(pa.Table.from_pandas(features, preserve_index=False), self.root, format="parquet",
+                             partitioning=ds.partitioning(pa.schema([(col, pa.int64()) for col in PARTITIONS]),
+                                                          flavor="hive"),
+                             existing_data_behavior="delete_matching", basename_template="part-{i}.parquet")
+        with open(self._meta_path(), "w") as f:
+            json.dump({"max_seconds": self.max_seconds}, f)
+
+        return len(features)
+
+    def add_season(self, competition_ID, season_ID, data_path, cache=None, open_data_path=None):
+        """
+        load every match of a season (both teams) and add its candidate one-twos
+        :param competition_ID: int, id number of competition
+        :param season_ID: int, id number of season
+        :param data_path: str, path to 360 data
+        :param cache: PassCache, optional on-disk cache (see one_two.cache)
+        :param open_data_path: str, optional path to the data folder of a local clone of the StatsBomb open-data
+        repository
+        :return: int, number of candidate one-twos written
+        """
+        matches = iter_match_passes(competition_ID, season_ID, None, data_path, all_teams=True, cache=cache,
+                                    columns=PASS_COLUMNS, open_data_path=open_data_path)
+        return self.add_matches(competition_ID, season_ID, matches)
+
+    def exists(self):
+        """
+        :return: bool, whether any seasons have been added yet
+        """
+        return os.path.exists(self._meta_path())
+
+    def dataset(self):
+        """
+        :return: pyarrow Dataset, the whole warehouse (nothing is read until it is scanned)
+        """
+        return ds.dataset(self.root, format="parquet",
+                          partitioning=ds.partitioning(pa.schema([(col, pa.int64()) for col in PARTITIONS]),
+                                                       flavor="hive"))
+
+    def seasons(self):
+        """
+        :return: dataframe, competition_id, season_id, number of matches and candidate one-twos of each stored season
+        """
+        table = self.dataset().to_table(columns=PARTITIONS).to_pandas()
+        return table.groupby(["competition_id", "season_id"]).agg(n_matches=("match_id", "nunique"),
+                                                                 n_candidates=("match_id", "size")).reset_index()
+
+    def query(self, competitions=None, seasons=None, matches=None, players=None, teams=None, zone=None,
+              zone_side="open", sec_threshold=5, prog_threshold=0.75, carry_threshold=5, by_possession=False,
+              columns=None, as_pairs=False):
+        """
+        one-twos matching every filter given - thresholds as for get_one_twos (see attached report), None skips one
+        :param competitions: list, optional competition ids
+        :param seasons: list, optional season ids
+        :param matches: list, optional match ids
+        :param players: list, optional player names - one-twos opened or closed by any of them
+        :param teams: list, optional team names (as StatsBomb has them, see statsbomb_team_name)
+        :param zone: tuple, optional (x_min, x_max, y_min, y_max) area of the pitch
+        :param zone_side: str, "open" for one-twos started (start of the opening pass) in the zone, "close" for ones
+        finished (end of the closing pass) in it
+        :param sec_threshold: float, time threshold - no more than the warehouse's max_seconds
+        :param prog_threshold: float, progression threshold
+        :param carry_threshold: float, carry threshold
+        :param by_possession: bool, if True only one-twos within one possession and period (see get_one_twos)
+        :param columns: list, optional columns to read (all by default)
+        :param as_pairs: bool, if True return OneTwoPairs (for get_player_counts, the heatmaps etc.)
+        :return: dataframe, one row per one-two (or OneTwoPairs)
+        """
+        if sec_threshold is not None and sec_threshold > self.max_seconds:
+            raise ValueError(f"sec_threshold {sec_threshold} is wider than the {self.max_seconds} seconds stored")
+
+        with profiling.stage("warehouse query") as record:
+            table = self.dataset().to_table(filter=query_filter(competitions, seasons, matches, players, teams, zone,
+                                                                zone_side, sec_threshold, prog_threshold,
+                                                                carry_threshold, by_possession),
+                                            columns=columns)
+            record["rows"] = table.num_rows
+        one_twos = table.to_pandas()
+        # files come back in no particular order - put the one-twos in match then pass order, as get_one_twos has them
+        order = [col for col in PARTITIONS + ["open_index", "close_index"] if col in one_twos.columns]
+        one_twos = one_twos.sort_values(order, kind="stable").reset_index(drop=True)
+        for col in ["opener", "closer", "team"]:
+            if col in one_twos.columns:
+                one_twos[col] = one_twos[col].astype("category")
+
+        return OneTwoPairs(one_twos) if as_pairs else one_twos
+
+    def sql(self, query):
+        """
+        run a DuckDB sql query over the warehouse, which is the table one_twos - e.g.
+        "select team, count(*) from one_twos where season_id = 90 and seconds <= 5 group by team"
+        duckdb pushes filters on the partition columns down to the folders it reads
+        :param query: str, sql query
+        :return: dataframe, the result
+        """
+        if duckdb is None:
+            raise ImportError("sql queries need duckdb (pip install duckdb) - use query otherwise")
+
+        with duckdb.connect() as con:
+            con.register("one_twos", self.dataset())
+            return con.execute(query).df()
+
+
+def match_features(passes_df, max_seconds=MAX_SECONDS):
+    """
+    candidate one-twos of a match with everything the warehouse queries filter on - find_candidates plus the ids,
+    possession, time and coordinates of both passes in OneTwoPairs naming
+    :param passes_df: dataframe, passes for one match (as from iter_match_passes)
+    :param max_seconds: float, widest time threshold to keep candidates for
+    :return: dataframe, one row per candidate one-two
+    """
+    candidates = find_candidates(passes_df, max_seconds)
+    open_pos = passes_df.index.get_indexer(candidates["open_index"])
+    close_pos = passes_df.index.get_indexer(candidates["close_index"])
+
+    features = candidates.drop(columns=["opener", "closer", "team"])
+    match_id = passes_df["match_id"].to_numpy(dtype="int64")[open_pos] if "match_id" in passes_df.columns else -1
+    features.insert(0, "match_id", match_id)
+    for col in ["opener", "closer", "team"]:
+        features.insert(features.columns.get_loc("close_index") + 1, col, candidates[col].astype(str).to_numpy())
+
+    start, end = _pass_xy(passes_df)
+    xy = {"x_start": start[:, 0], "y_start": start[:, 1], "x_end": end[:, 0], "y_end": end[:, 1]}
+    for side, pos in [("open", open_pos), ("close", close_pos)]:
+        for col in ["id", "period", "possession"]:
+            if col in passes_df.columns:
+                features[f"{side}_{col}"] = passes_df[col].to_numpy()[pos]
+        features[f"{side}_time_in_secs"] = (passes_df["minute"].to_numpy()[pos]*60 +
+                                            passes_df["second"].to_numpy()[pos]).astype(np.float32)
+        for col in ["x_start", "y_start", "x_end", "y_end"]:
+            features[f"{side}_{col}"] = xy[col][pos].astype(np.float32)
+        for flag in ["shot_assist", "goal_assist"]:
+            col = f"pass_{flag}"
+            features[f"{side}_{flag}"] = passes_df[col].eq(True).to_numpy()[pos] if col in passes_df.columns else False
+
+    return features
+
+
+def query_filter(competitions=None, seasons=None, matches=None, players=None, teams=None, zone=None, zone_side="open",
+                 sec_threshold=None, prog_threshold=None, carry_threshold=None, by_possession=False):
+    """
+    :return: pyarrow Expression, the filter of OneTwoWarehouse.query (None if there's nothing to filter on)
+    """
+    terms = []
+    for col, values in [("competition_id", competitions), ("season_id", seasons), ("match_id", matches)]:
+        if values is not None:
+            terms.append(ds.field(col).isin([int(value) for value in values]))
+    if players is not None:
+        terms.append(ds.field("opener").isin(list(players)) | ds.field("closer").isin(list(players)))
+    if teams is not None:
+        terms.append(ds.field("team").isin(list(teams)))
+    if zone is not None:
+        x, y = ("open_x_start", "open_y_start") if zone_side == "open" else ("close_x_end", "close_y_end")
+        x_min, x_max, y_min, y_max = zone
+        terms.append((ds.field(x) >= x_min) & (ds.field(x) <= x_max) & (ds.field(y) >= y_min) & (ds.field(y) <= y_max))
+
+    # same tests as get_one_twos
+    if sec_threshold is not None:
+        terms.append(ds.field("seconds") <= sec_threshold)
+    if prog_threshold is not None:
+        terms.append((ds.field("line_end") < ds.field("line_start")*prog_threshold) |
+                     (ds.field("goal_end") < ds.field("goal_start")*prog_threshold))
+    if carry_threshold is not None:
+        terms.append(ds.field("pass_dist") < carry_threshold)
+    if by_possession:
+        terms.append((ds.field("open_possession") == ds.field("close_possession")) &
+                     (ds.field("open_period") == ds.field("close_period")))
+
+    if len(terms) == 0:
+        return None
+    expression = terms[0]
+    for term in terms[1:]:
+        expression = expression & term
+    return expression
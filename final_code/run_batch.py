@@ -0,0 +1,168 @@
+# run many input files in one go - each competition/season is loaded and searched for one-twos once, however many
+# input files (e.g. teams) use it
+import matplotlib
+matplotlib.use("Agg")  # no display for batch runs (the plots are drawn with show=False anyway)
+from one_two.functions import iter_match_passes, get_one_twos, collect_one_twos, get_player_counts, \
+    total_one_two_stack, statsbomb_team_name, PASS_COLUMNS
+from one_two.cache import PassCache
+from one_two.pairs import OneTwoPairs
+from generate_plots import make_plots
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import glob
+import json
+import os
+
+
+def main(patterns, input_dir="inputs", plot_dir="batch_plots", cache_dir=None, jobs=2, render_workers=1):
+    """
+    run every input file matched by patterns, sharing the data loads between them
+    input files with players and n get the generate_plots plots, files for a team (team or team_name, like the old
+    inputs) get a stacked bar plot of that team's players - every job also saves its player counts as csv
+    :param patterns: list, input files - paths, globs (e.g. "old stuff/inputs/*.json") or names of files in input_dir
+    :param input_dir: str, folder to look for input files given by name
+    :param plot_dir: str, output folder - each input file gets a sub folder named after it
+    :param cache_dir: str, optional pass cache shared by every job (otherwise each season uses the cache_dir of its
+    first input file, if it has one)
+    :param jobs: int, number of seasons loaded at the same time
+    :param render_workers: int, number of processes drawing each input file's player heatmaps
+    :return: dict, {input file name: player counts}
+    """
+    batch = [read_job(path) for path in find_inputs(patterns, input_dir)]
+
+    # one group per season (and data source) - the passes are loaded once and searched once per set of thresholds
+    groups = {}
+    for job in batch:
+        groups.setdefault(data_key(job["inputs"]), []).append(job)
+    print(f"{len(batch)} input files, {len(groups)} seasons to load")
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(load_group, key, group_jobs, cache_dir): key for key, group_jobs in groups.items()}
+        # plotting isn't thread safe, so the jobs are finished here as each season comes in
+        for future in as_completed(futures):
+            one_twos = future.result()
+            for job in groups[futures[future]]:
+                results[job["name"]] = run_job(job, one_twos[thresholds(job["inputs"])], plot_dir, render_workers)
+
+    return results
+
+
+def find_inputs(patterns, input_dir="inputs"):
+    """
+    :param patterns: list, paths, globs or names of input files in input_dir
+    :param input_dir: str, folder to look for input files given by name
+    :return: list, paths of the input files (each once, in the order given)
+    """
+    paths = []
+    for pattern in patterns:
+        matched = sorted(glob.glob(pattern))
+        if len(matched) == 0:
+            matched = glob.glob(os.path.join(input_dir, f"{pattern}.json"))
+        if len(matched) == 0:
+            raise FileNotFoundError(f"no input files match {pattern}")
+        paths.extend(path for path in matched if path not in paths)
+
+    return paths
+
+
+def read_job(path):
+    """
+    :param path: str, path to an input file
+    :return: dict, name (file name without .json), inputs and team (None for whole-season inputs)
+    """
+    with open(path, "r") as f:
+        inputs = json.load(f)
+
+    # the old input files call it team_name
+    team = inputs.get("team", inputs.get("team_name"))
+
+    return {"name": os.path.splitext(os.path.basename(path))[0], "inputs": inputs, "team": team}
+
+
+def data_key(inputs):
+    """
+    :return: tuple, what decides which passes an input file needs - (competition, season, local data folder or None)
+    """
+    open_data_path = inputs["path_to_open_data"] if inputs.get("data_source") == "local" else None
+    return inputs["competition_id"], inputs["season_id"], open_data_path
+
+
+def thresholds(inputs):
+    """
+    :return: tuple, the one-two thresholds of an input file (seconds, progression, carry, by possession) - the
+    get_one_twos defaults for any it leaves out (as the Euros input file does)
+    """
+    return (inputs.get("threshold_seconds", 5), inputs.get("threshold_progression", 0.75),
+            inputs.get("threshold_carry", 5), inputs.get("by_possession", False))
+
+
+def load_group(key, group_jobs, cache_dir=None):
+    """
+    load a season's passes (both teams, every match) once and find the one-twos for each set of thresholds used
+    :param key: tuple, from data_key
+    :param group_jobs: list, jobs that need this season
+    :param cache_dir: str, optional shared pass cache
+    :return: dict, {thresholds: one-twos for the whole season}
+    """
+    comp_id, season_id, open_data_path = key
+    if cache_dir is None:
+        cache_dir = next((job["inputs"]["cache_dir"] for job in group_jobs if "cache_dir" in job["inputs"]), None)
+    cache = PassCache(cache_dir) if cache_dir is not None else None
+
+    # each match is searched for every set of thresholds as it's loaded, so only one match is held at a time
+    match_one_twos = {key: [] for key in set(thresholds(job["inputs"]) for job in group_jobs)}
+    for match_id, passes_df in iter_match_passes(comp_id, season_id, None, "", all_teams=True, cache=cache,
+                                                 columns=PASS_COLUMNS, open_data_path=open_data_path):
+        for (s, p, c, by_possession), collected in match_one_twos.items():
+            collected.append((match_id, get_one_twos(passes_df, sec_threshold=s, prog_threshold=p, carry_threshold=c,
+                                                     by_possession=by_possession)))
+
+    return {key: collect_one_twos(collected) for key, collected in match_one_twos.items()}
+
+
+def run_job(job, one_two_agg, plot_dir, render_workers=1):
+    """
+    player counts and plots for one input file from the season's one-twos
+    :param job: dict, from read_job
+    :param one_two_agg: dataframe, one-twos for the whole season (both teams of every match)
+    :param plot_dir: str, output folder
+    :param render_workers: int, number of processes drawing the player heatmaps
+    :return: dataframe, player counts
+    """
+    inputs = job["inputs"]
+    job_dir = os.path.join(plot_dir, job["name"])
+    os.makedirs(job_dir, exist_ok=True)
+    if len(one_two_agg) == 0:
+        print(f"{job['name']}: no one-twos found")
+        return None
+
+    # only the team's one-twos for team input files
+    pairs = OneTwoPairs.from_one_twos(one_two_agg)
+    if job["team"] is not None:
+        team = statsbomb_team_name(inputs["competition_id"], job["team"])
+        pairs = OneTwoPairs(pairs.data[pairs.data["team"] == team].reset_index(drop=True))
+    player_counts = get_player_counts(pairs)
+    player_counts.to_csv(os.path.join(job_dir, "player_counts.csv"), index=False)
+
+    if "players" in inputs and "n" in inputs and "competition_name" in inputs:
+        make_plots(inputs, pairs, player_counts, plot_dir=job_dir, show=False, workers=render_workers)
+    else:
+        total_one_two_stack(one_twos=player_counts, n=inputs.get("n", 5), plot_dir=job_dir, show=False)
+    print(f"{job['name']}: {len(pairs)} one-twos, saved to {job_dir}")
+
+    return player_counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="run one-two plots for many input files")
+    parser.add_argument("inputs", nargs="+", help="input files - paths, globs or names of files in --input-dir")
+    parser.add_argument("--input-dir", default="inputs")
+    parser.add_argument("--plot-dir", default="batch_plots")
+    parser.add_argument("--cache-dir", help="pass cache shared by every job")
+    parser.add_argument("--jobs", type=int, default=2, help="number of seasons loaded at the same time")
+    parser.add_argument("--render-workers", type=int, default=1, help="number of processes drawing player heatmaps")
+    args = parser.parse_args()
+
+    main(args.inputs, input_dir=args.input_dir, plot_dir=args.plot_dir, cache_dir=args.cache_dir, jobs=args.jobs,
+         render_workers=args.render_workers)
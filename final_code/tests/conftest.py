@@ -0,0 +1,5 @@
+# the scripts and the one_two package sit in final_code, one folder up from the tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+# the vectorised one-two detection must find exactly the same one-twos as the original loop - checked offline on small
+# handcrafted matches and on synthetic ones
+import numpy as np
+import pandas as pd
+import pytest
+from one_two.functions import get_one_twos
+from one_two.synthetic import synthetic_match_passes
+
+
+def _match(passes):
+    """
+    a handcrafted match - every pass goes from (50, 40) to (70, 40) and the return pass from (70, 40) to (90, 40), so
+    only the players and times decide what is a one-two (at a 5 second threshold)
+    :param passes: list, of (seconds, player, recipient, returned) - returned passes start where the last one ended
+    :return: dataframe, passes
+    """
+    rows = [{"id": f"e{k}", "match_id": 1, "period": 1, "possession": 1, "minute": int(secs//60),
+             "second": int(secs % 60), "player": player, "pass_recipient": recipient, "team": "Team",
+             "possession_team": "Team", "location": [70.0, 40.0] if returned else [50.0, 40.0],
+             "pass_end_location": [90.0, 40.0] if returned else [70.0, 40.0]}
+            for k, (secs, player, recipient, returned) in enumerate(passes)]
+    columns = ["id", "match_id", "period", "possession", "minute", "second", "player", "pass_recipient", "team",
+               "possession_team", "location", "pass_end_location"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+# name: (passes, expected number of one-twos)
+EDGE_CASES = {
+    # returned exactly at the threshold (counts) and a second after it (doesn't)
+    "window edge": ([(0, "A", "B", False), (5, "B", "A", True), (10, "C", "D", False), (16, "D", "C", True)], 1),
+    # returned in the same second, including a return pass listed before the pass it returns
+    "equal timestamps": ([(60, "A", "B", False), (60, "B", "A", True), (120, "D", "C", True),
+                          (120, "C", "D", False)], 2),
+    # missing passer or recipient never matches, even against another missing name
+    "nan recipients": ([(0, "A", np.nan, False), (2, np.nan, "A", True), (30, np.nan, np.nan, False),
+                        (31, np.nan, np.nan, True), (60, "A", "B", False), (62, "B", "A", True)], 1),
+    "empty match": ([], 0),
+}
+
+
+def _both_methods(passes_df, by_possession):
+    return [get_one_twos(passes_df.copy(), sec_threshold=5, prog_threshold=0.75, carry_threshold=5, method=method,
+                         by_possession=by_possession)
+            for method in ["loop", "vectorised"]]
+
+
+@pytest.mark.parametrize("by_possession", [False, True])
+@pytest.mark.parametrize("name", list(EDGE_CASES))
+def test_edge_cases(name, by_possession):
+    passes, expected = EDGE_CASES[name]
+    loop, vectorised = _both_methods(_match(passes), by_possession)
+
+    assert loop.equals(vectorised)
+    assert len(vectorised)//2 == expected
+
+
+@pytest.mark.parametrize("by_possession", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_synthetic_matches(seed, by_possession):
+    loop, vectorised = _both_methods(synthetic_match_passes(n_passes=300, seed=seed), by_possession)
+
+    assert loop.equals(vectorised)
+    assert len(vectorised) > 0
@@ -0,0 +1,86 @@
+# the local open-data backend against a tiny clone of the StatsBomb open-data layout in fixtures/open_data - two Euro
+# 2022 matches, the first with 360 data
+import os
+import numpy as np
+import pytest
+from one_two import open_data
+from one_two.functions import get_pass_data, PASS_COLUMNS
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "open_data")
+
+RETURN_PASS = "a0000000-0000-0000-0000-000000000003"
+
+
+def test_load_matches():
+    matches = open_data.load_matches(FIXTURE, 53, 106)
+
+    assert list(matches["match_id"]) == [101, 102]
+    # team dicts become the name plus an id, as in sb.matches
+    assert list(matches["home_team"]) == ["England Women's", "England Women's"]
+    assert list(matches["away_team"]) == ["Germany Women's", "Austria Women's"]
+    assert list(matches["away_team_id"]) == [857, 1214]
+    assert list(matches["competition_stage"]) == ["Final", "Group Stage"]
+    assert matches["last_updated_360"].isna().tolist() == [False, True]
+
+
+def test_load_events_flattening():
+    events = open_data.load_events(FIXTURE, 101).set_index("id")
+
+    assert (events["match_id"] == 101).all()
+    assert list(events["type"]) == ["Starting XI", "Pass", "Pass", "Shot", "Pass"]
+    assert events.loc[RETURN_PASS, "type_id"] == 30
+    assert events.loc[RETURN_PASS, "player"] == "Chloe Kelly"
+    assert events.loc[RETURN_PASS, "player_id"] == 10185
+    assert events.loc[RETURN_PASS, "possession_team"] == "England Women's"
+    # pass details become pass_ columns, named sub-dicts their name
+    assert events.loc[RETURN_PASS, "pass_recipient"] == "Bethany Mead"
+    assert events.loc[RETURN_PASS, "pass_recipient_id"] == 4633
+    assert events.loc[RETURN_PASS, "pass_height"] == "Ground Pass"
+    assert events.loc[RETURN_PASS, "pass_end_location"] == [90.0, 40.0]
+    assert events.loc[RETURN_PASS, "pass_shot_assist"] is True
+    assert events["pass_outcome"].dropna().tolist() == ["Incomplete"]
+    assert events["shot_statsbomb_xg"].dropna().tolist() == [0.12]
+    assert events["shot_outcome"].dropna().tolist() == ["Goal"]
+    # tactics is kept whole
+    assert events["tactics"].dropna().iloc[0]["formation"] == 4231
+
+
+def test_three_sixty_lookup():
+    lookup = open_data.load_three_sixty(FIXTURE, 101)
+
+    assert set(lookup) == {RETURN_PASS, "a0000000-0000-0000-0000-000000000004"}
+    assert len(lookup[RETURN_PASS]["freeze_frame"]) == 3
+    assert lookup[RETURN_PASS]["freeze_frame"][2]["keeper"] is True
+    assert open_data.load_three_sixty(FIXTURE, 102) is None
+
+
+def test_get_pass_data():
+    passes = get_pass_data(53, 106, None, "", all_teams=True, open_data_path=FIXTURE)
+
+    assert list(passes) == ["101", "102"]
+    # completed passes only
+    match_101 = passes["101"].set_index("id")
+    assert list(match_101.index) == ["a0000000-0000-0000-0000-000000000002", RETURN_PASS]
+    assert list(match_101["player"]) == ["Bethany Mead", "Chloe Kelly"]
+    assert list(match_101["pass_recipient"]) == ["Chloe Kelly", "Bethany Mead"]
+    assert list(match_101["location"]) == [[60.0, 40.0], [70.0, 40.0]]
+    # 360 data added by event id - nan for passes without a frame
+    assert match_101.loc[RETURN_PASS, "event_uuid"] == RETURN_PASS
+    assert match_101.loc[RETURN_PASS, "visible_area"] == [60.0, 10.0, 100.0, 10.0, 100.0, 70.0]
+    assert [player["location"] for player in match_101.loc[RETURN_PASS, "freeze_frame"]][1] == [75.0, 42.0]
+    assert np.isnan(match_101.loc["a0000000-0000-0000-0000-000000000002", "event_uuid"])
+
+    # no 360 file, so no 360 columns - and a pass out of play isn't completed
+    assert list(passes["102"]["id"]) == ["b0000000-0000-0000-0000-000000000001"]
+    assert "freeze_frame" not in passes["102"].columns
+
+
+def test_get_pass_data_projected():
+    passes = get_pass_data(53, 106, "England", "", open_data_path=FIXTURE, columns=PASS_COLUMNS)
+
+    match_101 = passes["101"]
+    assert "freeze_frame" not in match_101.columns
+    assert match_101["x_start"].tolist() == pytest.approx([60.0, 70.0])
+    assert match_101["y_end"].tolist() == pytest.approx([40.0, 40.0])
+    assert match_101["pass_shot_assist"].tolist() == [False, True]
+    assert match_101["player"].dtype == "category"